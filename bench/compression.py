@@ -0,0 +1,78 @@
+"""Bytes on the wire and CPU for a large product listing.
+
+Renders the listing with the stdlib encoder (what ``JSONResponse`` does) and
+with ``services.serialization.dumps`` (orjson when installed), then
+compresses the body with every encoding the compression middleware can
+negotiate, streamed in one chunk like a regular response.
+
+    python -m bench.compression --rows 10000 --repeat 10
+"""
+import argparse
+import json
+import time
+
+from bench.serialization import make_rows
+from fastapi.encoders import jsonable_encoder
+from models.product import Product
+from services import compression, serialization
+from services.serialization import RowSerializer, dumps
+
+
+def stdlib(rows: list) -> bytes:
+    return json.dumps(jsonable_encoder(rows), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(rows: list) -> bytes:
+    return dumps(rows)
+
+
+def compress(encoding: str, level: int):
+    def run(body: bytes) -> bytes:
+        if encoding == "br":
+            return compression._Compressor("br", compression.GZIP_LEVEL, level).chunk(body, final=True)
+        return compression._Compressor("gzip", level, compression.BROTLI_QUALITY).chunk(body, final=True)
+    return run
+
+
+def best_of(fn, value, repeat: int):
+    result = fn(value)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(value)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = RowSerializer(Product).rows(make_rows(args.rows))
+
+    print(f"{'serializer':<16} {'ms':>9} {'bytes':>11}")
+    body = None
+    fast_name = "orjson" if serialization.orjson is not None else "dumps (no orjson)"
+    for name, fn in (("stdlib json", stdlib), (fast_name, fast)):
+        seconds, body = best_of(fn, rows, args.repeat)
+        print(f"{name:<16} {seconds * 1000:>9.2f} {len(body):>11}")
+
+    encodings = [("identity", None), ("gzip-1", compress("gzip", 1)), ("gzip-6", compress("gzip", 6)), ("gzip-9", compress("gzip", 9))]
+    if compression.brotli is not None:
+        encodings += [("br-4", compress("br", 4)), ("br-11", compress("br", 11))]
+    else:
+        print("\nbrotli is not installed, skipping br")
+
+    print(f"\n{'encoding':<16} {'ms':>9} {'bytes':>11} {'ratio':>7}")
+    for name, fn in encodings:
+        if fn is None:
+            print(f"{name:<16} {0:>9.2f} {len(body):>11} {1:>7.2f}")
+            continue
+        seconds, compressed = best_of(fn, body, args.repeat)
+        print(f"{name:<16} {seconds * 1000:>9.2f} {len(compressed):>11} {len(body) / len(compressed):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
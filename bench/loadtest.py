@@ -0,0 +1,277 @@
+"""Offline load test of the FastAPI app against the SQLite stand-in.
+
+Seeds customers, sellers, products and sales, then drives ``main.app``
+in-process through an httpx ASGI client with concurrent virtual users. Each
+user repeatedly picks a scenario from the weighted mix and runs its
+requests back to back. Per-request and per-scenario p50/p95/p99 latency and
+overall requests per second are reported at the end.
+
+    python -m bench.loadtest --users 50 --duration 20 --db-latency-ms 0.5
+    python -m bench.loadtest --mix browse=1 --products 10000
+    python -m bench.loadtest --mix search=3,bulk=1
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import bcrypt
+import httpx
+
+from bench.sqlite_pool import SQLitePool
+from database import database, expiry
+from repositories.products import ProductRepository
+
+CATEGORIES = ["fruit", "vegetable", "dairy", "grain", "meat", "herbs", "nuts", "honey"]
+PASSWORD = "bench-password"
+
+SCENARIOS = ("browse", "checkout", "login", "dashboard", "search", "bulk")
+
+
+def seed(pool: SQLitePool, args, rng: random.Random):
+    # hash once at a realistic cost; every seeded account shares the password
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.bcrypt_rounds)).decode("utf-8")
+    today = date.today()
+
+    pool.executemany(
+        "INSERT INTO seller (sellerId, sellerName, sellerEmail, sellerPassword) VALUES (%s, %s, %s, %s)",
+        [(i, f"Seller {i}", f"seller{i}@example.com", hashed) for i in range(1, args.sellers + 1)],
+    )
+    pool.executemany(
+        "INSERT INTO customer (customerId, customerName, customerEmail, customerPassword) VALUES (%s, %s, %s, %s)",
+        [(i, f"Customer {i}", f"customer{i}@example.com", hashed) for i in range(1, args.customers + 1)],
+    )
+    pool.executemany(
+        """
+        INSERT INTO products (productId, productName, productQuantity, productImage, productPrice,
+                              productMake, productExpiry, productCategory, sellerId, sold)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        [
+            (
+                i,
+                f"Product {i}",
+                rng.randint(1_000, 100_000),
+                f"https://cdn.example.com/products/{i}.jpg",
+                round(rng.uniform(0.5, 50), 2),
+                today - timedelta(days=rng.randint(1, 60)),
+                # a tenth of the catalog is already expired
+                today + timedelta(days=rng.randint(-30, 300) if i % 10 == 0 else rng.randint(1, 300)),
+                CATEGORIES[i % len(CATEGORIES)],
+                rng.randint(1, args.sellers),
+                0,
+            )
+            for i in range(1, args.products + 1)
+        ],
+    )
+
+    sales = []
+    daily = defaultdict(lambda: [0, 0.0, 0])
+    start = datetime.now() - timedelta(days=365)
+    for _ in range(args.sales):
+        product_id = rng.randint(1, args.products)
+        seller_id = rng.randint(1, args.sellers)
+        quantity = rng.randint(1, 5)
+        price = round(rng.uniform(0.5, 50), 2)
+        when = start + timedelta(seconds=rng.randint(0, 365 * 86400))
+        sales.append((seller_id, rng.randint(1, args.customers), quantity, when, price, product_id))
+        bucket = daily[(when.date(), seller_id, product_id)]
+        bucket[0] += quantity
+        bucket[1] += quantity * price
+        bucket[2] += 1
+    pool.executemany(
+        "INSERT INTO sales (sellerId, customerId, quantity, salesDate, price, productId) VALUES (%s, %s, %s, %s, %s, %s)",
+        sales,
+    )
+    pool.executemany(
+        "INSERT INTO sales_daily (salesDay, sellerId, productId, units, revenue, orders) VALUES (%s, %s, %s, %s, %s, %s)",
+        [(day, seller, product, *totals) for (day, seller, product), totals in daily.items()],
+    )
+
+
+class Recorder:
+    def __init__(self):
+        self.requests = defaultdict(list)
+        self.scenarios = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.total = 0
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.requests[name].append(time.perf_counter() - start)
+        self.total += 1
+        if response.status_code >= 500 or response.status_code in (401, 422, 429):
+            self.errors[f"{name} {response.status_code}"] += 1
+        return response
+
+
+async def browse(client, recorder, rng, args):
+    response = await recorder.call(client, "GET /products", "GET", "/products", params={"limit": 50})
+    cursor = response.json().get("nextCursor") if response.status_code == 200 else None
+    if cursor:
+        await recorder.call(client, "GET /products (next page)", "GET", "/products", params={"limit": 50, "cursor": cursor})
+    await recorder.call(client, "GET /categories", "GET", "/categories")
+    await recorder.call(client, "GET /products/category/{category}", "GET", f"/products/category/{rng.choice(CATEGORIES)}")
+    for _ in range(3):
+        await recorder.call(client, "GET /products/{product_id}", "GET", f"/products/{rng.randint(1, args.products)}")
+
+
+async def checkout(client, recorder, rng, args):
+    items = [
+        {"productId": rng.randint(1, args.products), "sellerId": rng.randint(1, args.sellers), "quantity": rng.randint(1, 3), "price": 9.99}
+        for _ in range(rng.randint(1, 4))
+    ]
+    await recorder.call(client, "POST /sales/batch", "POST", "/sales/batch", json={"customerId": rng.randint(1, args.customers), "items": items})
+
+
+async def login(client, recorder, rng, args):
+    if rng.random() < 0.5:
+        params = {"customer_email": f"customer{rng.randint(1, args.customers)}@example.com", "password": PASSWORD}
+        await recorder.call(client, "POST /customers/login", "POST", "/customers/login", params=params)
+    else:
+        params = {"seller_email": f"seller{rng.randint(1, args.sellers)}@example.com", "password": PASSWORD}
+        await recorder.call(client, "POST /sellers/login", "POST", "/sellers/login", params=params)
+
+
+async def dashboard(client, recorder, rng, args):
+    seller_id = rng.randint(1, args.sellers)
+    await recorder.call(client, "GET /analytics/revenue", "GET", "/analytics/revenue", params={"sellerId": seller_id, "granularity": "week"})
+    await recorder.call(client, "GET /analytics/top-products", "GET", "/analytics/top-products", params={"sellerId": seller_id})
+    await recorder.call(client, "GET /sales/seller/{seller_id}", "GET", f"/sales/seller/{seller_id}")
+    await recorder.call(client, "GET /inventory/sellers/{seller_id}", "GET", f"/inventory/sellers/{seller_id}", params={"below": 10})
+
+
+async def search(client, recorder, rng, args):
+    params = {"q": f"{rng.choice(CATEGORIES)} product", "sort": rng.choice(["relevance", "price_asc", "sold"])}
+    await recorder.call(client, "GET /products/search", "GET", "/products/search", params=params)
+    params = {"prefix": f"Product {rng.randint(1, 99)}", "category": rng.choice(CATEGORIES), "maxPrice": 25}
+    await recorder.call(client, "GET /products/search (prefix)", "GET", "/products/search", params=params)
+
+
+# A seller imports a few new products and restocks one it has just read
+async def bulk(client, recorder, rng, args):
+    today = date.today()
+    rows = [
+        {
+            "productName": f"Imported {rng.randint(1, 10 ** 9)}",
+            "productQuantity": rng.randint(1, 500),
+            "productImage": "https://cdn.example.com/products/imported.jpg",
+            "productPrice": round(rng.uniform(0.5, 50), 2),
+            "productMake": today.isoformat(),
+            "productExpiry": (today + timedelta(days=rng.randint(1, 300))).isoformat(),
+            "productCategory": rng.choice(CATEGORIES),
+            "sellerId": rng.randint(1, args.sellers),
+        }
+        for _ in range(args.bulk_rows)
+    ]
+    response = await recorder.call(client, "GET /products/{product_id}", "GET", f"/products/{rng.randint(1, args.products)}")
+    if response.status_code == 200:
+        rows.append(dict(response.json(), productQuantity=rng.randint(1_000, 100_000)))
+    await recorder.call(client, "POST /products/bulk", "POST", "/products/bulk", json=rows)
+
+
+SCENARIO_FUNCTIONS = {
+    "browse": browse, "checkout": checkout, "login": login, "dashboard": dashboard, "search": search, "bulk": bulk,
+}
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIO_FUNCTIONS:
+            raise SystemExit(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def virtual_user(client, recorder, rng, args, mix, deadline):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        await SCENARIO_FUNCTIONS[name](client, recorder, rng, args)
+        recorder.scenarios[name].append(time.perf_counter() - start)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(title: str, series: dict):
+    print(f"\n{title:<40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, samples in sorted(series.items()):
+        print(
+            f"{name:<40} {len(samples):>7} {percentile(samples, 0.50) * 1000:>9.2f} "
+            f"{percentile(samples, 0.95) * 1000:>9.2f} {percentile(samples, 0.99) * 1000:>9.2f}"
+        )
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    pool = SQLitePool(maxsize=args.pool_size, latency=args.db_latency_ms / 1000)
+    pool.create_schema()
+    seed(pool, args, rng)
+    database.use_pool(pool, [pool.replica() for _ in range(args.replicas)])
+    # what the lifespan's daily sweep would have done to the expired tenth of the catalog
+    print(f"archived {await expiry.sweep()} expired products")
+    # and its index warm-up; MATCH ... AGAINST has no SQLite equivalent
+    connection = await database.acquire_connection()
+    try:
+        await ProductRepository(connection).load_search_index()
+        await ProductRepository(connection).load_inventory_index()
+    finally:
+        await database.release_connection(connection)
+
+    # imported after the pool is installed; the app's lifespan is not run
+    from main import app
+    from services import rate_limit
+
+    # every virtual user shares the ASGI client's address
+    rate_limit.login_ip_limiter.limit = args.login_ip_limit
+
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            virtual_user(client, recorder, random.Random(args.seed + user), args, mix, deadline)
+            for user in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    report("request", recorder.requests)
+    report("scenario", recorder.scenarios)
+    print(f"\n{recorder.total} requests in {elapsed:.1f}s = {recorder.total / elapsed:.1f} req/s with {args.users} users")
+    for name, count in sorted(recorder.errors.items()):
+        print(f"errors: {name} x{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test against a SQLite stand-in for MySQL")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--sellers", type=int, default=50)
+    parser.add_argument("--sales", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run")
+    parser.add_argument("--mix", default="browse=6,checkout=2,login=1,dashboard=1", help="Weighted scenario mix")
+    parser.add_argument("--bulk-rows", type=int, default=20, help="New products per bulk scenario upload")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--replicas", type=int, default=0, help="Read replicas, each with its own pool of --pool-size")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Simulated round trip per statement")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--login-ip-limit", type=int, default=10 ** 9, help="Login attempts per window from one IP")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Per-login database and CPU cost.
+
+Times the credential lookup (id and hash only) against the previous
+``SELECT *`` plus model construction, the bcrypt check at the configured
+cost, and a full ``authenticate`` for a known and an unknown email, which
+should take the same time.
+
+    python -m bench.login --accounts 10000 --repeat 200 --bcrypt-rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from bench.sqlite_pool import SQLitePool
+from database import database
+from models.customer import Customer
+from repositories.credentials import CredentialRepository
+from services import password
+
+PASSWORD = "bench-password"
+
+
+async def timed(fn, repeat: int) -> list:
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def show(name: str, samples: list):
+    print(f"{name:<34} median {statistics.median(samples) * 1e6:10.1f} us   max {max(samples) * 1e6:10.1f} us")
+
+
+async def run(args):
+    pool = SQLitePool(latency=args.db_latency_ms / 1000)
+    pool.create_schema()
+    hashed = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=args.bcrypt_rounds)).decode("utf-8")
+    pool.executemany(
+        "INSERT INTO customer (customerId, customerName, customerEmail, customerPassword) VALUES (%s, %s, %s, %s)",
+        [(i, f"Customer {i}", f"customer{i}@example.com", hashed) for i in range(1, args.accounts + 1)],
+    )
+    database.use_pool(pool)
+    password.BCRYPT_ROUNDS = args.bcrypt_rounds
+
+    from routes.login import authenticate
+
+    connection = await pool.acquire()
+    credentials = CredentialRepository(connection)
+
+    def email(i):
+        return f"customer{i % args.accounts + 1}@example.com"
+
+    async def old_lookup(i):
+        async with connection.cursor() as cursor:
+            await cursor.execute("SELECT * FROM customer WHERE customerEmail = %s", (email(i),))
+            Customer(**await cursor.fetchone())
+
+    async def new_lookup(i):
+        await credentials.lookup("customer", email(i))
+
+    async def verify(i):
+        await password.verify_password(PASSWORD, hashed)
+
+    bcrypt_repeat = max(5, args.repeat // 20)
+    show("lookup: SELECT * + Customer(**row)", await timed(old_lookup, args.repeat))
+    show("lookup: id + hash only", await timed(new_lookup, args.repeat))
+    show("bcrypt verify", await timed(verify, bcrypt_repeat))
+    show("authenticate: known email", await timed(lambda i: authenticate("customer", email(i), PASSWORD), bcrypt_repeat))
+    show("authenticate: unknown email", await timed(lambda i: authenticate("customer", f"nobody{i}@example.com", PASSWORD), bcrypt_repeat))
+    pool.release(connection)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-login DB and CPU cost")
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
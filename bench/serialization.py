@@ -0,0 +1,76 @@
+"""Per-row cost of rendering product listings.
+
+Compares the validated path (build a Product per row, then let FastAPI
+validate and encode the list against ``response_model``) with the trusted
+path (project rows and render them with ``TrustedJSONResponse``).
+
+    python -m bench.serialization --rows 1000 --repeat 20
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from models.product import Product
+from services.serialization import RowSerializer, TrustedJSONResponse
+
+
+def make_rows(count: int) -> list:
+    today = date.today()
+    return [
+        {
+            "productId": i,
+            "productName": f"Product {i}",
+            "productQuantity": 100 + i % 50,
+            "productImage": f"https://cdn.example.com/products/{i}.jpg",
+            "productPrice": Decimal("12.50") + i % 7,
+            "productMake": today - timedelta(days=30),
+            "productExpiry": today + timedelta(days=30 + i % 90),
+            "productCategory": f"category-{i % 12}",
+            "sellerId": i % 40,
+            "sold": i % 17,
+        }
+        for i in range(count)
+    ]
+
+
+def validated(rows: list) -> bytes:
+    products = [Product(**row) for row in rows]
+    # what FastAPI does with the handler's return value for response_model=List[Product]
+    checked = TypeAdapter(List[Product]).validate_python(products, from_attributes=True)
+    return JSONResponse(jsonable_encoder(checked)).body
+
+
+def trusted(rows: list, serializer=RowSerializer(Product)) -> bytes:
+    return TrustedJSONResponse(serializer.rows(rows)).body
+
+
+def measure(fn, rows: list, repeat: int) -> float:
+    fn(rows)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    for name, fn in (("validated", validated), ("trusted", trusted)):
+        seconds = measure(fn, rows, args.repeat)
+        print(f"{name:>10}: {seconds * 1000:8.2f} ms total  {seconds / args.rows * 1e6:7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""SQLite stand-in for the aiomysql pool, used by the offline benchmarks.
+
+It implements the slice of the aiomysql pool/connection/cursor API the
+repositories use and rewrites the MySQL dialect they emit (``%s``
+placeholders, ``FOR UPDATE``, ``ON DUPLICATE KEY UPDATE``, ``DATE_FORMAT``)
+into SQLite. Statements run synchronously on one in-memory database; an
+optional per-statement delay models the network round trip to MySQL.
+Columns declared DATE or DATETIME come back as ``date`` / ``datetime`` like
+they do from aiomysql, and a multi-row INSERT reports its first id as
+``lastrowid``, as MySQL's LAST_INSERT_ID() does.
+
+All handles share one SQLite connection, so an explicit transaction takes a
+pool-wide lock (standing in for InnoDB row locks) and autocommit writes from
+other handles wait for it.
+"""
+import asyncio
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+SCHEMA = """
+    CREATE TABLE customer (
+        customerId INTEGER PRIMARY KEY,
+        customerName TEXT NOT NULL,
+        customerEmail TEXT NOT NULL UNIQUE,
+        customerPassword TEXT NOT NULL
+    );
+    CREATE TABLE seller (
+        sellerId INTEGER PRIMARY KEY,
+        sellerName TEXT NOT NULL,
+        sellerEmail TEXT NOT NULL UNIQUE,
+        sellerPassword TEXT NOT NULL
+    );
+    CREATE TABLE products (
+        productId INTEGER PRIMARY KEY,
+        productName TEXT NOT NULL,
+        productQuantity INTEGER NOT NULL DEFAULT 0,
+        productImage TEXT NOT NULL DEFAULT '',
+        productPrice REAL NOT NULL,
+        productMake DATE NOT NULL,
+        productExpiry DATE NOT NULL,
+        productCategory TEXT NOT NULL,
+        sellerId INTEGER NOT NULL,
+        sold INTEGER NOT NULL DEFAULT 0,
+        rowVersion INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX idx_products_expiry ON products (productExpiry);
+    CREATE INDEX idx_products_seller_expiry ON products (sellerId, productExpiry);
+    CREATE INDEX idx_products_category_expiry ON products (productCategory, productExpiry);
+    CREATE TABLE products_archive (
+        productId INTEGER PRIMARY KEY,
+        productName TEXT NOT NULL,
+        productQuantity INTEGER NOT NULL DEFAULT 0,
+        productImage TEXT NOT NULL DEFAULT '',
+        productPrice REAL NOT NULL,
+        productMake DATE NOT NULL,
+        productExpiry DATE NOT NULL,
+        productCategory TEXT NOT NULL,
+        sellerId INTEGER NOT NULL,
+        sold INTEGER NOT NULL DEFAULT 0,
+        rowVersion INTEGER NOT NULL DEFAULT 0,
+        archivedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE sales (
+        SalesNumber INTEGER PRIMARY KEY,
+        sellerId INTEGER NOT NULL,
+        customerId INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        salesDate DATETIME NOT NULL,
+        price REAL NOT NULL,
+        productId INTEGER NOT NULL
+    );
+    CREATE INDEX idx_sales_seller_date ON sales (sellerId, salesDate);
+    CREATE INDEX idx_sales_customer_date ON sales (customerId, salesDate);
+    CREATE INDEX idx_sales_product ON sales (productId);
+    CREATE TABLE sales_daily (
+        salesDay DATE NOT NULL,
+        sellerId INTEGER NOT NULL,
+        productId INTEGER NOT NULL,
+        units INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        orders INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (salesDay, sellerId, productId)
+    );
+    CREATE INDEX idx_sales_daily_seller_day ON sales_daily (sellerId, salesDay);
+    CREATE TABLE sales_reservations (
+        reservationId TEXT PRIMARY KEY,
+        createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# MySQL DATE_FORMAT specifiers the queries use, mapped to strftime
+_DATE_FORMAT_CODES = {"%Y": "%Y", "%m": "%m", "%d": "%d", "%x": "%G", "%v": "%V", "%H": "%H", "%i": "%M", "%s": "%S"}
+_DATE_FORMAT_RE = re.compile(r"%[a-zA-Z]")
+
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    return parsed.strftime(_DATE_FORMAT_RE.sub(lambda m: _DATE_FORMAT_CODES.get(m.group(0), m.group(0)), fmt))
+
+
+# Values are stored as ISO text (see _adapt) and parsed back by declared type
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+
+
+_REWRITES = (
+    (re.compile(r"\s+FOR UPDATE\b", re.IGNORECASE), ""),
+    (re.compile(r"ON DUPLICATE KEY UPDATE", re.IGNORECASE), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE), r"excluded.\1"),
+)
+
+
+def translate(sql: str) -> str:
+    sql = sql.replace("%s", "?").replace("%%", "%")
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def _is_insert(sql: str) -> bool:
+    return sql.lstrip()[:6].upper() == "INSERT"
+
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _params(args):
+    if args is None:
+        return ()
+    if isinstance(args, dict):
+        return {key: _adapt(value) for key, value in args.items()}
+    if not isinstance(args, (list, tuple)):
+        args = (args,)
+    return tuple(_adapt(value) for value in args)
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection._db.cursor()
+        self.rowcount = -1
+        self.lastrowid = None
+
+    async def execute(self, query, args=None):
+        await self._connection._round_trip()
+        async with self._connection._write_guard(query):
+            self._cursor.execute(translate(query), _params(args))
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        if self.lastrowid and self.rowcount > 1 and _is_insert(query):
+            # SQLite reports the last row, MySQL the first of a multi-row INSERT
+            self.lastrowid -= self.rowcount - 1
+        return self.rowcount
+
+    async def executemany(self, query, args):
+        await self._connection._round_trip()
+        async with self._connection._write_guard(query):
+            self._cursor.executemany(translate(query), [_params(row) for row in args])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def _row(self, row):
+        if row is None:
+            return None
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    async def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    async def fetchmany(self, size=None):
+        return [self._row(row) for row in self._cursor.fetchmany(size or self._cursor.arraysize)]
+
+    async def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    async def close(self):
+        self._cursor.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class _CursorContext:
+    """Lets ``connection.cursor()`` be awaited or used with ``async with``, like aiomysql."""
+
+    def __init__(self, connection):
+        self._cursor = SQLiteCursor(connection)
+
+    def __await__(self):
+        async def get():
+            return self._cursor
+        return get().__await__()
+
+    async def __aenter__(self):
+        return self._cursor
+
+    async def __aexit__(self, *exc):
+        await self._cursor.close()
+
+
+_WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+class _NoGuard:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class SQLiteConnection:
+    def __init__(self, pool):
+        self._pool = pool
+        self._db = pool._db
+        self._latency = pool.latency
+        self._in_transaction = False
+        self.closed = False
+
+    async def _round_trip(self):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
+    def _write_guard(self, query: str):
+        if self._in_transaction or not query.lstrip().upper().startswith(_WRITES):
+            return _NoGuard()
+        return self._pool._transaction_lock
+
+    def cursor(self, *cursor_class):
+        return _CursorContext(self)
+
+    def get_transaction_status(self):
+        return self._in_transaction
+
+    async def begin(self):
+        await self._round_trip()
+        await self._pool._transaction_lock.acquire()
+        self._in_transaction = True
+        self._db.execute("BEGIN")
+
+    async def commit(self):
+        if self._in_transaction:
+            self._db.execute("COMMIT")
+            self._end_transaction()
+
+    async def rollback(self):
+        if self._in_transaction:
+            self._db.execute("ROLLBACK")
+            self._end_transaction()
+
+    def _end_transaction(self):
+        self._in_transaction = False
+        self._pool._transaction_lock.release()
+
+    def close(self):
+        # the shared database stays open; only this handle is retired
+        if self._in_transaction:
+            self._db.execute("ROLLBACK")
+            self._end_transaction()
+        self.closed = True
+
+
+class SQLitePool:
+    """A bounded pool of handles onto one in-memory SQLite database.
+
+    ``latency`` is the simulated round trip per statement, in seconds. A pool
+    built with ``share`` uses that pool's database and transaction lock.
+    """
+
+    def __init__(self, maxsize: int = 10, latency: float = 0.0, path: str = ":memory:", share=None):
+        if share is None:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+            self._db.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+            self._db.create_function("CURDATE", 0, lambda: date.today().isoformat())
+            self._transaction_lock = asyncio.Lock()
+        else:
+            self._db = share._db
+            self._transaction_lock = share._transaction_lock
+        self.maxsize = maxsize
+        self.latency = latency
+        self._free = asyncio.Queue()
+        self._size = 0
+
+    # Another pool over the same database: a replica with no replication lag
+    def replica(self):
+        return SQLitePool(self.maxsize, self.latency, share=self)
+
+    def create_schema(self):
+        self._db.executescript(SCHEMA)
+
+    def executemany(self, sql: str, rows):
+        self._db.executemany(translate(sql), [_params(row) for row in rows])
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def freesize(self):
+        return self._free.qsize()
+
+    async def acquire(self):
+        if self._free.empty() and self._size < self.maxsize:
+            self._size += 1
+            return SQLiteConnection(self)
+        return await self._free.get()
+
+    def release(self, connection):
+        if connection.closed:
+            self._size -= 1
+            return
+        self._free.put_nowait(connection)
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        self._db.close()
@@ -0,0 +1,120 @@
+"""Daily sweep moving expired products into ``products_archive``.
+
+Product reads assume every row in ``products`` is active, so the app
+lifespan runs ``run_daily``: one sweep at startup, then one just after each
+local midnight. Each chunk copies and deletes at most ``chunk_size`` rows in
+its own short transaction on a freshly borrowed connection, pausing between
+chunks, so the sweep never holds row locks or a pooled connection for long.
+
+    python -m database.expiry sweep --chunk-size 500
+"""
+import argparse
+import asyncio
+import os
+from datetime import date, datetime, time, timedelta
+
+from database.database import acquire_connection, close_pool, create_pool, release_connection
+from repositories.products import PRODUCT_COLUMNS
+from services.cache import invalidate_deleted_product
+from services.inventory import inventory_index
+from services.search import product_index
+
+EXPIRY_SWEEP_ENABLED = os.getenv("EXPIRY_SWEEP_ENABLED", "1") == "1"
+EXPIRY_SWEEP_CHUNK_SIZE = int(os.getenv("EXPIRY_SWEEP_CHUNK_SIZE", "500"))
+EXPIRY_SWEEP_PAUSE = float(os.getenv("EXPIRY_SWEEP_PAUSE", "0.05"))
+
+# Oldest expiries first so the scan stays on idx_products_expiry
+SELECT_EXPIRED_CHUNK = """
+    SELECT productId FROM products
+    WHERE productExpiry <= %s
+    ORDER BY productExpiry, productId
+    LIMIT %s
+    FOR UPDATE
+"""
+ARCHIVE_PRODUCTS = """
+    INSERT INTO products_archive ({columns})
+    SELECT {columns} FROM products WHERE productId IN ({placeholders})
+"""
+DELETE_PRODUCTS = "DELETE FROM products WHERE productId IN ({placeholders})"
+
+
+# Archive one chunk of products that expired on or before `today`; returns their ids
+async def sweep_chunk(connection, today: date, chunk_size: int) -> list:
+    async with connection.cursor() as cursor:
+        await connection.begin()
+        try:
+            await cursor.execute(SELECT_EXPIRED_CHUNK, (today, chunk_size))
+            product_ids = [row["productId"] for row in await cursor.fetchall()]
+            if product_ids:
+                placeholders = ", ".join(["%s"] * len(product_ids))
+                columns = ", ".join(PRODUCT_COLUMNS)
+                await cursor.execute(ARCHIVE_PRODUCTS.format(columns=columns, placeholders=placeholders), product_ids)
+                await cursor.execute(DELETE_PRODUCTS.format(placeholders=placeholders), product_ids)
+        except BaseException:
+            await connection.rollback()
+            raise
+        await connection.commit()
+    return product_ids
+
+
+# Archive every expired product chunk by chunk; returns how many were moved
+async def sweep(today: date = None, chunk_size: int = EXPIRY_SWEEP_CHUNK_SIZE, pause: float = EXPIRY_SWEEP_PAUSE) -> int:
+    today = today or date.today()
+    archived = 0
+    while True:
+        connection = await acquire_connection()
+        try:
+            product_ids = await sweep_chunk(connection, today, chunk_size)
+        finally:
+            await release_connection(connection)
+        for product_id in product_ids:
+            invalidate_deleted_product(product_id)
+            product_index.remove(product_id)
+            inventory_index.remove(product_id)
+        archived += len(product_ids)
+        if len(product_ids) < chunk_size:
+            return archived
+        await asyncio.sleep(pause)
+
+
+def _seconds_until_next_day() -> float:
+    tomorrow = datetime.combine(date.today() + timedelta(days=1), time(0, 0, 1))
+    return max(1.0, (tomorrow - datetime.now()).total_seconds())
+
+
+# Background task started from the app lifespan; cancelled on shutdown
+async def run_daily():
+    while True:
+        try:
+            archived = await sweep()
+            if archived:
+                print(f"Archived {archived} expired products")
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            # a failed sweep leaves expired rows in place until the next run
+            print(f"Error sweeping expired products: {err}")
+        await asyncio.sleep(_seconds_until_next_day())
+
+
+async def _run(chunk_size: int):
+    await create_pool()
+    try:
+        print(f"archived {await sweep(chunk_size=chunk_size)} expired products")
+    finally:
+        await close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move expired products into products_archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sweep_parser = commands.add_parser("sweep", help="Archive every product expired on or before today")
+    sweep_parser.add_argument("--chunk-size", type=int, default=EXPIRY_SWEEP_CHUNK_SIZE, help="Products archived per transaction")
+    args = parser.parse_args()
+
+    if args.command == "sweep":
+        asyncio.run(_run(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
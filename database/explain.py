@@ -0,0 +1,63 @@
+"""Startup check that the hot queries are served by an index.
+
+Queries are registered with a representative set of parameters; at startup
+each one is run through EXPLAIN and any table accessed with a full scan
+(``type = ALL``) is reported. Tiny tables are legitimately scanned, so a
+warning on an almost empty database is expected.
+"""
+from datetime import date
+
+_queries = {}
+
+
+def register_query(name: str, sql: str, params=()):
+    _queries[name] = (sql, tuple(params))
+
+
+def registered_queries() -> dict:
+    return dict(_queries)
+
+
+# EXPLAIN every registered query; returns {name: [tables scanned in full]}
+async def find_full_scans(connection) -> dict:
+    scans = {}
+    async with connection.cursor() as cursor:
+        for name, (sql, params) in _queries.items():
+            await cursor.execute("EXPLAIN " + sql, params)
+            tables = [row["table"] for row in await cursor.fetchall() if row.get("type") == "ALL"]
+            if tables:
+                scans[name] = tables
+    return scans
+
+
+async def check_query_plans(connection):
+    try:
+        scans = await find_full_scans(connection)
+    except Exception as err:
+        print(f"Warning: could not EXPLAIN registered queries: {err}")
+        return
+    for name, tables in scans.items():
+        print(f"Warning: query {name} does a full table scan on {', '.join(tables)}")
+
+
+# Registered from the repositories' own statements so the check follows the real SQL
+def _register_defaults():
+    from database.expiry import SELECT_EXPIRED_CHUNK
+    from repositories.credentials import SELECT_CREDENTIALS
+    from repositories.products import SELECT_ACTIVE_BY_CATEGORY, SELECT_ACTIVE_BY_ID, SELECT_ACTIVE_BY_SELLER, SELECT_SELLER_STOCK
+    from repositories.sales import SELECT_BY_CUSTOMER, SELECT_BY_SELLER
+
+    today = date.today().isoformat()
+    register_query("products.by_id", SELECT_ACTIVE_BY_ID, (1,))
+    register_query("products.by_seller", SELECT_ACTIVE_BY_SELLER, (1,))
+    register_query("products.by_category", SELECT_ACTIVE_BY_CATEGORY, ("",))
+    register_query("products.seller_stock", SELECT_SELLER_STOCK, (1, 10))
+    register_query("products.expired", SELECT_EXPIRED_CHUNK, (today, 500))
+    register_query("sales.by_seller", SELECT_BY_SELLER, (1,))
+    register_query("sales.by_customer", SELECT_BY_CUSTOMER, (1,))
+    register_query("sales_daily.by_seller", "SELECT * FROM sales_daily WHERE sellerId = %s AND salesDay >= %s", (1, today))
+    register_query("login.customer", SELECT_CREDENTIALS["customer"], ("",))
+    register_query("login.seller", SELECT_CREDENTIALS["seller"], ("",))
+
+
+_register_defaults()
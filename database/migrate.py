@@ -0,0 +1,141 @@
+"""Versioned schema migrations.
+
+Each module in ``database/migrations`` named ``v<NNNN>_<description>.py``
+defines a ``STATEMENTS`` list. Versions are applied in order and recorded in
+``schema_migrations`` so each one runs exactly once. MySQL commits DDL
+implicitly, so each statement that succeeds is also recorded in
+``schema_migration_progress``; a migration that failed part way resumes at
+the failed statement instead of re-running the ones already applied. A run
+holds the ``schema_migrations`` named lock, so workers migrating on startup
+apply each version once, one after another.
+
+    python -m database.migrate            # apply pending migrations
+    python -m database.migrate --status   # list applied and pending versions
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import pkgutil
+from pathlib import Path
+
+from database.database import acquire_connection, close_pool, create_pool, release_connection
+
+MIGRATIONS_PACKAGE = "database.migrations"
+MIGRATIONS_PATH = Path(__file__).with_name("migrations")
+MIGRATE_LOCK_TIMEOUT = int(os.getenv("DB_MIGRATE_LOCK_TIMEOUT", "300"))
+
+CREATE_SCHEMA_MIGRATIONS = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        appliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version)
+    )
+"""
+CREATE_SCHEMA_MIGRATION_PROGRESS = """
+    CREATE TABLE IF NOT EXISTS schema_migration_progress (
+        version INT NOT NULL,
+        statements INT NOT NULL,
+        PRIMARY KEY (version)
+    )
+"""
+RECORD_PROGRESS = """
+    INSERT INTO schema_migration_progress (version, statements) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE statements = VALUES(statements)
+"""
+
+
+# (version, name) for every migration module, in version order
+def discover_migrations():
+    migrations = []
+    for module in pkgutil.iter_modules([str(MIGRATIONS_PATH)]):
+        prefix, _, _ = module.name.partition("_")
+        if prefix.startswith("v") and prefix[1:].isdigit():
+            migrations.append((int(prefix[1:]), module.name))
+    return sorted(migrations)
+
+
+async def applied_versions(cursor) -> set:
+    await cursor.execute(CREATE_SCHEMA_MIGRATIONS)
+    await cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in await cursor.fetchall()}
+
+
+# {version: statements already applied} for migrations that failed part way
+async def partial_progress(cursor) -> dict:
+    await cursor.execute(CREATE_SCHEMA_MIGRATION_PROGRESS)
+    await cursor.execute("SELECT version, statements FROM schema_migration_progress")
+    return {row["version"]: row["statements"] for row in await cursor.fetchall()}
+
+
+class MigrationLockTimeout(Exception):
+    """Another process held the migration lock for DB_MIGRATE_LOCK_TIMEOUT seconds."""
+
+
+# Apply every pending migration on ``connection``; returns the names applied
+async def migrate(connection) -> list:
+    async with connection.cursor() as cursor:
+        await cursor.execute("SELECT GET_LOCK('schema_migrations', %s) AS locked", (MIGRATE_LOCK_TIMEOUT,))
+        if (await cursor.fetchone())["locked"] != 1:
+            raise MigrationLockTimeout("timed out waiting for the schema_migrations lock")
+        try:
+            # read after taking the lock, so versions another worker applied are skipped
+            return await _apply_pending(connection, cursor)
+        finally:
+            await cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+            await cursor.fetchone()
+
+
+async def _apply_pending(connection, cursor) -> list:
+    applied = []
+    done = await applied_versions(cursor)
+    progress = await partial_progress(cursor)
+    for version, name in discover_migrations():
+        if version in done:
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{name}")
+        # DDL is not rolled back, so every applied statement is recorded and
+        # a retry starts after the last one that succeeded
+        start = progress.get(version, 0)
+        for step, statement in enumerate(module.STATEMENTS[start:], start=start + 1):
+            await cursor.execute(statement)
+            await cursor.execute(RECORD_PROGRESS, (version, step))
+            await connection.commit()
+        await cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        await cursor.execute("DELETE FROM schema_migration_progress WHERE version = %s", (version,))
+        await connection.commit()
+        applied.append(name)
+    return applied
+
+
+async def _run(status: bool):
+    await create_pool()
+    connection = await acquire_connection()
+    try:
+        if status:
+            async with connection.cursor() as cursor:
+                done = await applied_versions(cursor)
+                progress = await partial_progress(cursor)
+            for version, name in discover_migrations():
+                if version in progress:
+                    print(f"partial  {name} ({progress[version]} statements applied)")
+                else:
+                    print(f"{'applied' if version in done else 'pending'}  {name}")
+        else:
+            applied = await migrate(connection)
+            print("\n".join(f"applied  {name}" for name in applied) or "schema is up to date")
+    finally:
+        await release_connection(connection)
+        await close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations without applying them")
+    args = parser.parse_args()
+    asyncio.run(_run(args.status))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Base tables. IF NOT EXISTS lets this run against databases created by hand.
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS customer (
+        customerId INT NOT NULL AUTO_INCREMENT,
+        customerName VARCHAR(255) NOT NULL,
+        customerEmail VARCHAR(255) NOT NULL,
+        customerPassword VARCHAR(255) NOT NULL,
+        PRIMARY KEY (customerId)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS seller (
+        sellerId INT NOT NULL AUTO_INCREMENT,
+        sellerName VARCHAR(255) NOT NULL,
+        sellerEmail VARCHAR(255) NOT NULL,
+        sellerPassword VARCHAR(255) NOT NULL,
+        PRIMARY KEY (sellerId)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        productId INT NOT NULL AUTO_INCREMENT,
+        productName VARCHAR(255) NOT NULL,
+        productQuantity INT NOT NULL DEFAULT 0,
+        productImage VARCHAR(1024) NOT NULL DEFAULT '',
+        productPrice DECIMAL(10, 2) NOT NULL,
+        productMake DATE NOT NULL,
+        productExpiry DATE NOT NULL,
+        productCategory VARCHAR(100) NOT NULL,
+        sellerId INT NOT NULL,
+        sold INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (productId)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sales (
+        SalesNumber INT NOT NULL AUTO_INCREMENT,
+        sellerId INT NOT NULL,
+        customerId INT NOT NULL,
+        quantity INT NOT NULL,
+        salesDate DATETIME NOT NULL,
+        price DECIMAL(10, 2) NOT NULL,
+        productId INT NOT NULL,
+        PRIMARY KEY (SalesNumber)
+    )
+    """,
+]
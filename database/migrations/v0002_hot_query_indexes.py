@@ -0,0 +1,15 @@
+# Secondary indexes matching the filters used by the routers.
+STATEMENTS = [
+    # GET /products, listing by expiry
+    "CREATE INDEX idx_products_expiry ON products (productExpiry)",
+    # per-seller and per-category listings, both filtered on expiry
+    "CREATE INDEX idx_products_seller_expiry ON products (sellerId, productExpiry)",
+    "CREATE INDEX idx_products_category_expiry ON products (productCategory, productExpiry)",
+    # sales by seller / customer, optionally bounded by date (exports)
+    "CREATE INDEX idx_sales_seller_date ON sales (sellerId, salesDate)",
+    "CREATE INDEX idx_sales_customer_date ON sales (customerId, salesDate)",
+    "CREATE INDEX idx_sales_product ON sales (productId)",
+    # login lookups
+    "CREATE UNIQUE INDEX uq_customer_email ON customer (customerEmail)",
+    "CREATE UNIQUE INDEX uq_seller_email ON seller (sellerEmail)",
+]
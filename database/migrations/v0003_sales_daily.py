@@ -0,0 +1,6 @@
+from database.rollup import CREATE_SALES_DAILY
+
+# Daily rollup maintained by checkout; backfill with `python -m database.rollup rebuild`
+STATEMENTS = [
+    CREATE_SALES_DAILY.format(table="sales_daily"),
+]
@@ -0,0 +1,4 @@
+# FULLTEXT index behind the MySQL fallback of GET /products/search
+STATEMENTS = [
+    "CREATE FULLTEXT INDEX ft_products_name_category ON products (productName, productCategory)",
+]
@@ -0,0 +1,5 @@
+# Expired products, moved out of the hot products table by database.expiry
+STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS products_archive LIKE products",
+    "ALTER TABLE products_archive ADD COLUMN archivedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP",
+]
@@ -0,0 +1,5 @@
+# Row version for compare-and-swap product updates; the archive keeps the column too
+STATEMENTS = [
+    "ALTER TABLE products ADD COLUMN rowVersion INT NOT NULL DEFAULT 0",
+    "ALTER TABLE products_archive ADD COLUMN rowVersion INT NOT NULL DEFAULT 0",
+]
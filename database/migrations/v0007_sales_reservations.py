@@ -0,0 +1,11 @@
+# Stock reserved by a write-behind checkout whose sales rows are not written
+# yet; record_sales deletes the row in the transaction that writes them
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS sales_reservations (
+        reservationId CHAR(32) NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (reservationId)
+    )
+    """,
+]
@@ -0,0 +1,159 @@
+"""Daily per-seller/per-product sales rollup.
+
+``sales_daily`` holds one row per (salesDay, sellerId, productId) with the
+units, revenue and number of sales lines for that day. Checkout keeps it
+current inside its own transaction via ``record_sales``; ``rebuild``
+recomputes it from the raw ``sales`` table in primary-key chunks.
+
+    python -m database.rollup rebuild --chunk-size 50000
+"""
+import argparse
+import asyncio
+
+from database.database import acquire_connection, close_pool, create_pool, release_connection
+
+CREATE_SALES_DAILY = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        salesDay DATE NOT NULL,
+        sellerId INT NOT NULL,
+        productId INT NOT NULL,
+        units BIGINT NOT NULL DEFAULT 0,
+        revenue DECIMAL(16, 2) NOT NULL DEFAULT 0,
+        orders INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (salesDay, sellerId, productId),
+        KEY idx_sales_daily_seller_day (sellerId, salesDay),
+        KEY idx_sales_daily_product_day (productId, salesDay)
+    )
+"""
+
+UPSERT_SALES_DAILY = """
+    INSERT INTO sales_daily (salesDay, sellerId, productId, units, revenue, orders)
+    VALUES (%s, %s, %s, %s, %s, 1)
+    ON DUPLICATE KEY UPDATE
+        units = units + VALUES(units),
+        revenue = revenue + VALUES(revenue),
+        orders = orders + VALUES(orders)
+"""
+
+# Folds one SalesNumber range of raw sales into a rollup table
+FOLD_SALES_CHUNK = """
+    INSERT INTO {table} (salesDay, sellerId, productId, units, revenue, orders)
+    SELECT DATE(salesDate), sellerId, productId, SUM(quantity), SUM(quantity * price), COUNT(*)
+    FROM sales
+    WHERE SalesNumber > %s AND SalesNumber <= %s
+    GROUP BY DATE(salesDate), sellerId, productId
+    ON DUPLICATE KEY UPDATE
+        units = {table}.units + VALUES(units),
+        revenue = {table}.revenue + VALUES(revenue),
+        orders = {table}.orders + VALUES(orders)
+"""
+
+# Folds sales lines that were still uncommitted when their range was folded
+FOLD_SALES_IDS = """
+    INSERT INTO {table} (salesDay, sellerId, productId, units, revenue, orders)
+    SELECT DATE(salesDate), sellerId, productId, SUM(quantity), SUM(quantity * price), COUNT(*)
+    FROM sales
+    WHERE SalesNumber IN ({ids})
+    GROUP BY DATE(salesDate), sellerId, productId
+    ON DUPLICATE KEY UPDATE
+        units = {table}.units + VALUES(units),
+        revenue = {table}.revenue + VALUES(revenue),
+        orders = {table}.orders + VALUES(orders)
+"""
+
+# Checkout writes sales and sales_daily, so it waits on these for the final
+# pass and the swap; taking them also waits out every open sales transaction
+LOCK_FOR_SWAP = "LOCK TABLES sales READ, sales_daily WRITE, sales_daily_rebuild WRITE"
+
+
+# UPSERT_SALES_DAILY parameters for freshly inserted sales lines; the caller
+# runs them in the same transaction as the sales INSERT
+def sales_daily_rows(sales_date, items) -> list:
+    return [(sales_date.date(), item.sellerId, item.productId, item.quantity, item.quantity * item.price) for item in items]
+
+
+async def _max_sales_number(cursor) -> int:
+    await cursor.execute("SELECT COALESCE(MAX(SalesNumber), 0) AS high FROM sales")
+    return (await cursor.fetchone())["high"]
+
+
+# Folds (low, high] chunk by chunk and returns the SalesNumbers in it that had
+# no row yet. The locking read waits for in-flight inserts in the chunk, so the
+# fold and the returned gaps see the same rows; a gap is either rolled back or
+# a sale committed later, which the final pass folds
+async def _fold(connection, cursor, table: str, low: int, high: int, chunk_size: int) -> list:
+    gaps = []
+    while low < high:
+        upper = min(low + chunk_size, high)
+        await cursor.execute(
+            "SELECT SalesNumber FROM sales WHERE SalesNumber > %s AND SalesNumber <= %s ORDER BY SalesNumber FOR SHARE",
+            (low, upper),
+        )
+        expected = low + 1
+        for row in await cursor.fetchall():
+            gaps.extend(range(expected, row["SalesNumber"]))
+            expected = row["SalesNumber"] + 1
+        gaps.extend(range(expected, upper + 1))
+        await cursor.execute(FOLD_SALES_CHUNK.format(table=table), (low, upper))
+        await connection.commit()
+        print(f"folded sales {low + 1}..{upper}")
+        low = upper
+    return gaps
+
+
+async def _fold_ids(cursor, table: str, ids: list, chunk_size: int):
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        await cursor.execute(FOLD_SALES_IDS.format(table=table, ids=", ".join(["%s"] * len(chunk))), chunk)
+
+
+# Recompute sales_daily into a shadow table and swap it in atomically. Sales
+# written while the first pass runs are picked up by a catch-up pass, so the
+# live table keeps serving reports throughout. The last pass and the rename
+# run under LOCK_FOR_SWAP: it folds the sales that committed since, plus any
+# earlier gap that has since been filled, so no sale is lost or counted twice.
+# Checkout only blocks for that last, short pass.
+async def rebuild(chunk_size: int):
+    await create_pool()
+    connection = await acquire_connection()
+    try:
+        async with connection.cursor() as cursor:
+            await cursor.execute(CREATE_SALES_DAILY.format(table="sales_daily"))
+            await cursor.execute("DROP TABLE IF EXISTS sales_daily_rebuild")
+            await cursor.execute(CREATE_SALES_DAILY.format(table="sales_daily_rebuild"))
+
+            done = await _max_sales_number(cursor)
+            gaps = await _fold(connection, cursor, "sales_daily_rebuild", 0, done, chunk_size)
+            high = await _max_sales_number(cursor)
+            gaps += await _fold(connection, cursor, "sales_daily_rebuild", done, high, chunk_size)
+            done = high
+
+            await cursor.execute(LOCK_FOR_SWAP)
+            try:
+                await _fold_ids(cursor, "sales_daily_rebuild", gaps, chunk_size)
+                high = await _max_sales_number(cursor)
+                await cursor.execute(FOLD_SALES_CHUNK.format(table="sales_daily_rebuild"), (done, high))
+                await connection.commit()
+                await cursor.execute("RENAME TABLE sales_daily TO sales_daily_old, sales_daily_rebuild TO sales_daily")
+            finally:
+                await cursor.execute("UNLOCK TABLES")
+            await cursor.execute("DROP TABLE sales_daily_old")
+            print(f"sales_daily rebuilt from {high} sales")
+    finally:
+        await release_connection(connection)
+        await close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the sales_daily rollup table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="Recompute sales_daily from the sales table")
+    rebuild_parser.add_argument("--chunk-size", type=int, default=50000, help="Sales rows folded per transaction")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        asyncio.run(rebuild(args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
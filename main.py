@@ -1,8 +1,79 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routes import customer, products, seller, sales, login
 
-app = FastAPI()
+from database.database import (
+    DB_EXPLAIN_ON_STARTUP,
+    DB_MIGRATE_ON_STARTUP,
+    DB_STICKY_SECONDS,
+    STICKY_COOKIE,
+    acquire_connection,
+    close_pool,
+    create_pool,
+    release_connection,
+    replicas,
+    run_replica_checks,
+    track_writes,
+)
+from database.expiry import EXPIRY_SWEEP_ENABLED, run_daily
+from database.explain import check_query_plans
+from database.migrate import migrate
+from repositories.products import ProductRepository
+from services import password
+from services.index_refresh import INDEX_REFRESH_INTERVAL, run_index_refresh
+from services.inventory import INVENTORY_INDEX_ENABLED
+from services.search import SEARCH_INDEX_ENABLED
+from services.serialization import FastJSONResponse
+from services.write_behind import SALES_WRITE_BEHIND, sales_write_behind
+from services.compression import CompressionMiddleware
+from services.metrics import http_request_duration
+from routes import analytics, customer, inventory, metrics, products, seller, sales, login
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_pool()
+    if DB_MIGRATE_ON_STARTUP or DB_EXPLAIN_ON_STARTUP or SEARCH_INDEX_ENABLED or INVENTORY_INDEX_ENABLED:
+        connection = await acquire_connection()
+        try:
+            if DB_MIGRATE_ON_STARTUP:
+                await migrate(connection)
+            if DB_EXPLAIN_ON_STARTUP:
+                await check_query_plans(connection)
+            if SEARCH_INDEX_ENABLED:
+                await ProductRepository(connection).load_search_index()
+            if INVENTORY_INDEX_ENABLED:
+                await ProductRepository(connection).load_inventory_index()
+        finally:
+            await release_connection(connection)
+    if SALES_WRITE_BEHIND:
+        await sales_write_behind.start()
+    background = []
+    if EXPIRY_SWEEP_ENABLED:
+        background.append(asyncio.create_task(run_daily()))
+    if replicas():
+        background.append(asyncio.create_task(run_replica_checks()))
+    if (SEARCH_INDEX_ENABLED or INVENTORY_INDEX_ENABLED) and INDEX_REFRESH_INTERVAL > 0:
+        background.append(asyncio.create_task(run_index_refresh()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # queued sales need the pool, so drain them before closing it
+        await sales_write_behind.stop()
+        await close_pool()
+        password.shutdown()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,8 +83,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip or brotli for bodies over COMPRESSION_MINIMUM_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+
+
+# Latency per route template (not per concrete path) so ids do not explode the series
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        template = route.path if route is not None else "unmatched"
+        http_request_duration.observe(time.perf_counter() - start, request.method, template, status)
+
+
+# A client whose request wrote anything reads from the primary for the next
+# DB_STICKY_SECONDS, so it sees its own writes despite replica lag
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    writes = track_writes()
+    response = await call_next(request)
+    if writes["wrote"] and replicas():
+        response.set_cookie(STICKY_COOKIE, "1", max_age=DB_STICKY_SECONDS, httponly=True, samesite="lax")
+    return response
+
+
 app.include_router(products.router)
 app.include_router(customer.router)
 app.include_router(seller.router)
 app.include_router(sales.router)
-app.include_router(login.router)
\ No newline at end of file
+app.include_router(login.router)
+app.include_router(analytics.router)
+app.include_router(inventory.router)
+app.include_router(metrics.router)
@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class RevenueBucket(BaseModel):
+    period: str = Field(description="Day (YYYY-MM-DD), ISO week (YYYY-Www) or month (YYYY-MM)")
+    revenue: float = Field(description="Sum of quantity * price")
+    units: int = Field(description="Units sold")
+
+
+class ProductTotal(BaseModel):
+    productId: int
+    productName: Optional[str] = Field(description="Null for a product deleted outright")
+    revenue: float
+    units: int
+
+
+class CategoryTotal(BaseModel):
+    productCategory: Optional[str] = Field(description="Null for products deleted outright")
+    revenue: float
+    units: int
@@ -0,0 +1,11 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class StockLevel(BaseModel):
+    productId: int
+    productName: str
+    productQuantity: int = Field(description="Number of units available")
+    sold: int = Field(description="Sold Quantity")
+    sellerId: int
+    rowVersion: Optional[int] = None
@@ -0,0 +1,7 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class Page(BaseModel):
+    items: List[Dict[str, Any]] = Field(description="Rows of this page, restricted to the requested fields")
+    nextCursor: Optional[str] = Field(default=None, description="Opaque token for the next page, null on the last page")
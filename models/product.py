@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class Product(BaseModel):
@@ -12,3 +13,41 @@ class Product(BaseModel):
     productCategory: str = Field(description="Category the product belongs to")
     sellerId: int = Field(description="Foreign key referencing a seller table")
     sold: int = Field(description="Sold Quantity")
+    rowVersion: Optional[int] = Field(default=None, description="Row version, bumped by every write; send it back (or as If-Match) to update")
+
+
+# Partial update: only the fields present in the request body are written
+class ProductPatch(BaseModel):
+    productName: Optional[str] = None
+    productQuantity: Optional[int] = Field(default=None, ge=0)
+    productImage: Optional[str] = None
+    productPrice: Optional[float] = Field(default=None, ge=0)
+    productMake: Optional[date] = None
+    productExpiry: Optional[date] = None
+    productCategory: Optional[str] = None
+    sellerId: Optional[int] = None
+
+
+# One row of a bulk import: without productId it is created, with one it is
+# upserted; updating an existing product needs the rowVersion it was read at
+class ProductImport(Product):
+    productId: Optional[int] = Field(default=None, description="Existing product to update, omitted for a new product")
+    rowVersion: Optional[int] = Field(default=None, description="Required to update an existing product; the row is skipped as a conflict if it has changed")
+    sold: int = Field(default=0, description="Sold Quantity, only used when the product is created")
+
+
+class BulkRowStatus(BaseModel):
+    row: int = Field(description="1-based position of the row in the upload")
+    status: Literal["created", "updated", "conflict", "invalid", "failed"]
+    productId: Optional[int] = None
+    rowVersion: Optional[int] = Field(default=None, description="Version after the write, or the current one on a conflict")
+    errors: List[str] = Field(default_factory=list)
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    updated: int
+    conflict: int
+    invalid: int
+    failed: int
+    rows: List[BulkRowStatus]
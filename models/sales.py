@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Literal, Optional
 
 class Sales(BaseModel):
     SalesNumber: int
@@ -9,3 +10,29 @@ class Sales(BaseModel):
     salesDate: datetime
     price: float
     productId: int
+
+
+class SaleLine(BaseModel):
+    productId: int
+    sellerId: int
+    quantity: int = Field(gt=0)
+    price: float
+
+
+class SalesBatch(BaseModel):
+    customerId: int
+    salesDate: Optional[datetime] = None
+    items: List[SaleLine] = Field(min_length=1)
+
+
+class SaleLineResult(BaseModel):
+    productId: int
+    quantity: int
+    status: Literal["ok", "insufficient_stock", "not_found"]
+    available: Optional[int] = None
+
+
+class SalesBatchResult(BaseModel):
+    customerId: int
+    salesDate: datetime
+    items: List[SaleLineResult]
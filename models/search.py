@@ -0,0 +1,10 @@
+from typing import Dict, List
+from pydantic import BaseModel, Field
+
+from models.product import Product
+
+
+class ProductSearchResult(BaseModel):
+    total: int = Field(description="Number of products matching every filter")
+    items: List[Product] = Field(description="Requested slice of the matching products")
+    facets: Dict[str, int] = Field(description="Matching products per category, ignoring the category filter")
@@ -0,0 +1,67 @@
+from repositories.base import Repository
+
+# Reports read the sales_daily rollup (see database/rollup.py), so their cost
+# grows with the number of days reported on rather than the number of sales.
+
+# SQL expression that buckets salesDay for each granularity; % is doubled for the driver
+PERIOD_EXPRESSIONS = {
+    "day": "DATE_FORMAT(s.salesDay, '%%Y-%%m-%%d')",
+    "week": "DATE_FORMAT(s.salesDay, '%%x-W%%v')",
+    "month": "DATE_FORMAT(s.salesDay, '%%Y-%%m')",
+}
+
+REVENUE_BY_PERIOD = """
+    SELECT {period} AS period, SUM(s.revenue) AS revenue, SUM(s.units) AS units
+    FROM sales_daily s{where} GROUP BY period ORDER BY period
+"""
+# Archived (expired) products keep their sales, so names and categories are
+# looked up in products and products_archive; a product deleted outright
+# still counts, with a NULL name and category
+PRODUCT_JOINS = """
+    LEFT JOIN products p ON p.productId = s.productId
+    LEFT JOIN products_archive a ON p.productId IS NULL AND a.productId = s.productId
+"""
+TOP_PRODUCTS = """
+    SELECT s.productId, COALESCE(p.productName, a.productName) AS productName,
+        SUM(s.revenue) AS revenue, SUM(s.units) AS units
+    FROM sales_daily s{joins}{where}
+    GROUP BY s.productId, COALESCE(p.productName, a.productName) ORDER BY {order} DESC LIMIT %s
+"""
+CATEGORY_TOTALS = """
+    SELECT COALESCE(p.productCategory, a.productCategory) AS productCategory,
+        SUM(s.revenue) AS revenue, SUM(s.units) AS units
+    FROM sales_daily s{joins}{where}
+    GROUP BY COALESCE(p.productCategory, a.productCategory) ORDER BY revenue DESC
+"""
+
+
+def _where(seller_id, start, end):
+    conditions = []
+    params = []
+    if seller_id is not None:
+        conditions.append("s.sellerId = %s")
+        params.append(seller_id)
+    if start is not None:
+        conditions.append("s.salesDay >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append("s.salesDay < %s")
+        params.append(end)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, tuple(params)
+
+
+class AnalyticsRepository(Repository):
+
+    async def revenue(self, granularity: str, seller_id=None, start=None, end=None) -> list:
+        where, params = _where(seller_id, start, end)
+        return await self.fetchall(REVENUE_BY_PERIOD.format(period=PERIOD_EXPRESSIONS[granularity], where=where), params)
+
+    # ``by`` is "revenue" or "units", validated by the route
+    async def top_products(self, limit: int, by: str, seller_id=None, start=None, end=None) -> list:
+        where, params = _where(seller_id, start, end)
+        return await self.fetchall(TOP_PRODUCTS.format(joins=PRODUCT_JOINS, where=where, order=by), params + (limit,))
+
+    async def category_totals(self, seller_id=None, start=None, end=None) -> list:
+        where, params = _where(seller_id, start, end)
+        return await self.fetchall(CATEGORY_TOTALS.format(joins=PRODUCT_JOINS, where=where), params)
@@ -0,0 +1,69 @@
+from contextlib import asynccontextmanager
+
+from fastapi import Depends
+
+from database.database import get_connection, get_read_connection, note_write
+
+
+class Repository:
+    """Data access for one table over the request's pooled connection.
+
+    Every statement a repository runs goes through ``fetchone``, ``fetchall``
+    or ``execute`` so there is a single place to time or trace queries.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def fetchone(self, sql: str, params=()):
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, params=()) -> list:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(sql, params)
+            return list(await cursor.fetchall())
+
+    # Run a write; returns (rowcount, lastrowid)
+    async def execute(self, sql: str, params=()):
+        note_write()
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+
+    async def executemany(self, sql: str, rows) -> int:
+        note_write()
+        async with self.connection.cursor() as cursor:
+            await cursor.executemany(sql, rows)
+            return cursor.rowcount
+
+    # Group several writes into one transaction on this connection
+    @asynccontextmanager
+    async def transaction(self):
+        await self.connection.begin()
+        try:
+            yield
+        except BaseException:
+            await self.connection.rollback()
+            raise
+        await self.connection.commit()
+
+
+# Build a FastAPI dependency that wraps the request's connection in ``repository_class``.
+# get_connection is cached per request, so every repository a handler asks for shares it.
+def provide(repository_class):
+    async def dependency(connection=Depends(get_connection)):
+        return repository_class(connection)
+
+    dependency.__name__ = f"get_{repository_class.__name__}"
+    return dependency
+
+
+# Same, over a replica connection (see get_read_connection) for read-only handlers
+def provide_read(repository_class):
+    async def dependency(connection=Depends(get_read_connection)):
+        return repository_class(connection)
+
+    dependency.__name__ = f"get_{repository_class.__name__}_read"
+    return dependency
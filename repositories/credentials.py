@@ -0,0 +1,15 @@
+from repositories.base import Repository
+
+# Only the id and hash are read, through the unique email index (uq_customer_email /
+# uq_seller_email); the rest of the account row never leaves MySQL on a login
+SELECT_CREDENTIALS = {
+    "customer": "SELECT customerId AS accountId, customerPassword AS passwordHash FROM customer WHERE customerEmail = %s LIMIT 1",
+    "seller": "SELECT sellerId AS accountId, sellerPassword AS passwordHash FROM seller WHERE sellerEmail = %s LIMIT 1",
+}
+
+
+class CredentialRepository(Repository):
+
+    # {"accountId", "passwordHash"} for a ``role`` ("customer" or "seller") email, or None
+    async def lookup(self, role: str, email: str):
+        return await self.fetchone(SELECT_CREDENTIALS[role], (email,))
@@ -0,0 +1,40 @@
+from models.customer import Customer
+from repositories.base import Repository
+from services.pagination import fetch_page
+
+# Columns a listing may return; the password hash is never selectable
+CUSTOMER_COLUMNS = [field for field in Customer.model_fields if field != "customerPassword"]
+
+INSERT_CUSTOMER = """
+    INSERT INTO customer (customerId, customerName, customerEmail, customerPassword)
+    VALUES (%s, %s, %s, %s)
+"""
+SELECT_CUSTOMER = "SELECT * FROM customer WHERE customerId = %s"
+UPDATE_CUSTOMER = """
+    UPDATE customer SET customerName = %s, customerEmail = %s, customerPassword = %s
+    WHERE customerId = %s
+"""
+DELETE_CUSTOMER = "DELETE FROM customer WHERE customerId = %s"
+
+
+class CustomerRepository(Repository):
+
+    async def create(self, customer: Customer, hashed_password: str):
+        await self.execute(INSERT_CUSTOMER, (customer.customerId, customer.customerName, customer.customerEmail, hashed_password))
+        await self.connection.commit()
+
+    async def page(self, page: dict):
+        return await fetch_page(self.fetchall, "customer", "customerId", CUSTOMER_COLUMNS, page)
+
+    async def get(self, customer_id: int):
+        return await self.fetchone(SELECT_CUSTOMER, (customer_id,))
+
+    async def update(self, customer_id: int, customer: Customer, hashed_password: str) -> bool:
+        rowcount, _ = await self.execute(UPDATE_CUSTOMER, (customer.customerName, customer.customerEmail, hashed_password, customer_id))
+        await self.connection.commit()
+        return rowcount > 0
+
+    async def delete(self, customer_id: int) -> bool:
+        rowcount, _ = await self.execute(DELETE_CUSTOMER, (customer_id,))
+        await self.connection.commit()
+        return rowcount > 0
@@ -0,0 +1,501 @@
+import time
+from datetime import date
+from typing import Optional
+
+from database.database import DB_REPLICA_CHECK_INTERVAL, DB_REPLICA_MAX_LAG, is_replica
+
+from models.product import BulkRowStatus, Product, ProductImport
+from repositories.base import Repository
+from services.cache import (
+    MISSING,
+    catalog_cache,
+    invalidate_changed_product,
+    invalidate_deleted_product,
+    invalidate_new_product,
+    listing_tags,
+    products_version,
+)
+from services.inventory import STOCK_FIELDS, inventory_index
+from services.pagination import fetch_page
+from services.search import product_index, tokenize
+from services.singleflight import product_reads
+from services.serialization import RowSerializer
+
+PRODUCT_COLUMNS = list(Product.model_fields)
+product_rows = RowSerializer(Product)
+
+# Expired products are moved to products_archive by database.expiry. Reads
+# still filter on productExpiry (served by the *_expiry indexes) so that rows
+# saved with a past expiry, or left behind when a sweep fails, are never shown.
+ACTIVE = "productExpiry > CURDATE()"
+SELECT_ACTIVE_BY_ID = f"SELECT * FROM products WHERE productId = %s AND {ACTIVE}"
+SELECT_ACTIVE_BY_SELLER = f"SELECT * FROM products WHERE sellerId = %s AND {ACTIVE}"
+SELECT_ACTIVE_BY_CATEGORY = f"SELECT * FROM products WHERE productCategory = %s AND {ACTIVE}"
+SELECT_CATEGORIES = f"SELECT DISTINCT productCategory FROM products WHERE {ACTIVE}"
+SELECT_PRODUCT = "SELECT * FROM products WHERE productId = %s"
+INSERT_PRODUCT = """
+    INSERT INTO products (
+        productName, productQuantity, productImage, productPrice,
+        productMake, productExpiry, productCategory, sellerId, sold
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+UPDATE_PRODUCT = """
+    UPDATE products SET
+        productName = %s,
+        productQuantity = %s,
+        productImage = %s,
+        productPrice = %s,
+        productMake = %s,
+        productExpiry = %s,
+        productCategory = %s,
+        sellerId = %s,
+        sold = %s,
+        rowVersion = rowVersion + 1
+    WHERE productId = %s
+"""
+SELECT_ROW_VERSION = "SELECT rowVersion FROM products WHERE productId = %s"
+DELETE_PRODUCT = "DELETE FROM products WHERE productId = %s"
+SELECT_ALL_PRODUCTS = "SELECT * FROM products"
+# Changes whenever a product is added, removed or written (every write bumps
+# rowVersion), and each day, when more products stop being ACTIVE
+SELECT_FINGERPRINT = """
+    SELECT COUNT(*) AS products, COALESCE(MAX(productId), 0) AS highest, COALESCE(SUM(rowVersion), 0) AS versions,
+           CURDATE() AS today
+    FROM products
+"""
+SELECT_STOCK_LEVELS = f"SELECT {', '.join(STOCK_FIELDS)} FROM products WHERE {ACTIVE}"
+# Fallback for inventory reads while the in-process index is not warmed
+SELECT_SELLER_STOCK = SELECT_STOCK_LEVELS + " AND sellerId = %s AND productQuantity < %s ORDER BY productQuantity, productId"
+
+# Bulk import: one multi-row statement per chunk for new products and one for
+# existing ones. Updates never touch sold, which only checkout maintains.
+BULK_COLUMNS = [
+    "productName", "productQuantity", "productImage", "productPrice",
+    "productMake", "productExpiry", "productCategory", "sellerId",
+]
+LOCK_EXISTING = "SELECT productId, rowVersion FROM products WHERE productId IN ({placeholders}) FOR UPDATE"
+# database.expiry moves expired rows to products_archive under the same id
+SELECT_ARCHIVED = "SELECT productId FROM products_archive WHERE productId IN ({placeholders})"
+BULK_INSERT = "INSERT INTO products ({columns}, sold) VALUES {rows}"
+# Rows at or after the first id of a bulk INSERT, to match the created rows to their ids
+SELECT_INSERTED = f"SELECT productId, {', '.join(BULK_COLUMNS)} FROM products WHERE productId >= %s ORDER BY productId"
+BULK_UPSERT = """
+    INSERT INTO products (productId, {columns}, sold) VALUES {rows}
+    ON DUPLICATE KEY UPDATE {assignments}, rowVersion = rowVersion + 1
+"""
+
+# ORDER BY for each GET /products/search sort, relevance is added when there is a query
+SEARCH_ORDER = {
+    "price_asc": "productPrice ASC, productId",
+    "price_desc": "productPrice DESC, productId",
+    "sold": "sold DESC, productId",
+    "relevance": "productId",
+}
+
+
+class VersionConflict(Exception):
+    """A compare-and-swap write found the product at another rowVersion."""
+
+    def __init__(self, product_id: int, current: int):
+        super().__init__(f"Product {product_id} is at version {current}")
+        self.current = current
+
+
+def _bulk_values(product: ProductImport) -> tuple:
+    return (
+        product.productName,
+        product.productQuantity,
+        product.productImage,
+        product.productPrice,
+        product.productMake,
+        product.productExpiry,
+        product.productCategory,
+        product.sellerId,
+        product.sold,
+    )
+
+
+# Why a bulk row with a productId may not be written, or None if it may
+def _bulk_conflict(product: ProductImport, versions: dict, archived: set, seen: set) -> Optional[str]:
+    if product.productId in seen:
+        return "productId appears more than once in the chunk"
+    if product.productId in archived:
+        return "productId belongs to an archived product"
+    current = versions.get(product.productId)
+    if current is None:
+        return "product not found" if product.rowVersion is not None else None
+    if product.rowVersion is None:
+        return "rowVersion is required to update an existing product"
+    if product.rowVersion != current:
+        return "product was modified since rowVersion was read"
+    return None
+
+
+# What a created row is recognised by when its id is read back
+def _natural_key(row) -> tuple:
+    get = row.get if isinstance(row, dict) else lambda column: getattr(row, column)
+    return (
+        get("sellerId"), get("productName"), get("productCategory"),
+        str(get("productMake")), str(get("productExpiry")),
+    )
+
+
+def _product_values(product: Product) -> tuple:
+    return (
+        product.productName,
+        product.productQuantity,
+        product.productImage,
+        product.productPrice,
+        product.productMake,
+        product.productExpiry,
+        product.productCategory,
+        product.sellerId,
+        product.sold,
+    )
+
+
+class ProductRepository(Repository):
+    """Product reads go through the catalog cache; writes invalidate it.
+
+    Cache misses and single-product reads are coalesced by ``product_reads``,
+    so concurrent identical requests share one query. Every product write
+    bumps ``products_version``, which is part of the single-flight key, so a
+    caller arriving after a write never joins a query started before it.
+
+    Reads on a replica connection use cached entries but never fill the
+    cache or join a single-flight call: the cache is shared with clients
+    reading their own writes from the primary, and a lagging replica could
+    hand them pre-write rows. ``possibly_stale`` is set when such a read
+    ran within replication lag of this process's last product write.
+    """
+
+    possibly_stale = False
+
+    async def active_page(self, page: dict):
+        key = ("products", page["cursor"], page["limit"], page["fields"])
+        return await self._cached(
+            key,
+            lambda: fetch_page(self.fetchall, "products", "productId", PRODUCT_COLUMNS, page, ACTIVE),
+            lambda result: listing_tags(("all",), (row["productId"] for row in result.items)),
+        )
+
+    async def get_active(self, product_id: int):
+        if self._on_replica():
+            row = await self.fetchone(SELECT_ACTIVE_BY_ID, (product_id,))
+        else:
+            key = ("product", product_id, products_version.version)
+            row = await product_reads.do(key, lambda: self.fetchone(SELECT_ACTIVE_BY_ID, (product_id,)))
+        return product_rows.row(row) if row else None
+
+    async def active_by_seller(self, seller_id: int) -> list:
+        return await self._cached_listing(("seller", seller_id), SELECT_ACTIVE_BY_SELLER, seller_id)
+
+    async def active_by_category(self, category: str) -> list:
+        return await self._cached_listing(("category", category), SELECT_ACTIVE_BY_CATEGORY, category)
+
+    async def categories(self) -> list:
+        return await self._cached(("categories",), self._load_categories, lambda _: [("categories",)])
+
+    async def _load_categories(self) -> list:
+        rows = await self.fetchall(SELECT_CATEGORIES)
+        return [row["productCategory"] for row in rows if row and row["productCategory"]]
+
+    async def _cached_listing(self, shape: tuple, sql: str, value) -> list:
+        async def load():
+            return product_rows.rows(await self.fetchall(sql, (value,)))
+
+        return await self._cached(
+            ("products", *shape), load, lambda products: listing_tags(shape, (product["productId"] for product in products))
+        )
+
+    # Cached read of `key`: a miss runs load() once per key and products_version
+    async def _cached(self, key: tuple, load, tags):
+        value = catalog_cache.get(key)
+        if value is MISSING and self._on_replica():
+            value = await load()
+        elif value is MISSING:
+            version = products_version.version
+            value = await product_reads.do((*key, version), lambda: self._fill(key, version, load, tags))
+        return value
+
+    def _on_replica(self) -> bool:
+        if not is_replica(self.connection):
+            return False
+        # replicas in rotation lag at most DB_REPLICA_MAX_LAG, as of the last check
+        if time.time() - products_version.modified <= DB_REPLICA_MAX_LAG + DB_REPLICA_CHECK_INTERVAL:
+            self.possibly_stale = True
+        return True
+
+    async def _fill(self, key: tuple, version: int, load, tags):
+        value = await load()
+        # a write that landed while the query ran has already invalidated this
+        # key; caching the result now would bring the pre-write rows back
+        if products_version.version == version:
+            catalog_cache.set(key, value, tags(value))
+        return value
+
+    # Insert a product and return it with its new id, without reading it back
+    async def create(self, product: Product) -> Product:
+        _, product_id = await self.execute(INSERT_PRODUCT, _product_values(product))
+        await self.connection.commit()
+        created = product.model_copy(update={"productId": product_id, "rowVersion": 0})
+        invalidate_new_product(created)
+        if product_index.ready:
+            product_index.upsert(created.model_dump())
+        if inventory_index.ready:
+            inventory_index.upsert(created.model_dump())
+        return created
+
+    # Overwrite a product, only if it is still at `expected_version` when one is
+    # given. Returns the stored product, None if the id is unknown, and raises
+    # VersionConflict if another write got there first.
+    async def update(self, product_id: int, product: Product, expected_version: Optional[int] = None):
+        sql, params = UPDATE_PRODUCT, _product_values(product) + (product_id,)
+        if expected_version is not None:
+            sql, params = sql + " AND rowVersion = %s", params + (expected_version,)
+        async with self.transaction():
+            rowcount, _ = await self.execute(sql, params)
+            # the UPDATE holds the row lock, so this reads our own version
+            row = await self.fetchone(SELECT_ROW_VERSION, (product_id,))
+        if row is None:
+            return None
+        if rowcount == 0:
+            raise VersionConflict(product_id, row["rowVersion"])
+        invalidate_changed_product(product_id, product)
+        updated = product.model_copy(update={"productId": product_id, "rowVersion": row["rowVersion"]})
+        if product_index.ready:
+            product_index.upsert(updated.model_dump())
+        if inventory_index.ready:
+            inventory_index.upsert(updated.model_dump())
+        return updated
+
+    # Write only the columns in `changes`, with the same version check as update;
+    # returns the stored row or None if the id is unknown
+    async def patch(self, product_id: int, changes: dict, expected_version: Optional[int] = None):
+        rowcount = 1
+        async with self.transaction():
+            if changes:
+                assignments = ", ".join(f"{column} = %s" for column in changes)
+                sql = f"UPDATE products SET {assignments}, rowVersion = rowVersion + 1 WHERE productId = %s"
+                params = (*changes.values(), product_id)
+                if expected_version is not None:
+                    sql, params = sql + " AND rowVersion = %s", params + (expected_version,)
+                rowcount, _ = await self.execute(sql, params)
+            row = await self.fetchone(SELECT_PRODUCT, (product_id,))
+        if row is None:
+            return None
+        if rowcount == 0 or (not changes and expected_version not in (None, row["rowVersion"])):
+            raise VersionConflict(product_id, row["rowVersion"])
+        if changes:
+            invalidate_changed_product(product_id, Product.model_validate(row))
+            if product_index.ready:
+                product_index.upsert(row)
+            if inventory_index.ready:
+                inventory_index.upsert(row)
+        return product_rows.row(row)
+
+    async def delete(self, product_id: int) -> bool:
+        rowcount, _ = await self.execute(DELETE_PRODUCT, (product_id,))
+        await self.connection.commit()
+        if rowcount == 0:
+            return False
+        invalidate_deleted_product(product_id)
+        product_index.remove(product_id)
+        inventory_index.remove(product_id)
+        return True
+
+    # Write one validated chunk of a bulk import in a single transaction. Rows
+    # without a productId are created. A row whose productId exists must carry
+    # the rowVersion it was read at and is only written while the product is
+    # still at that version, like PUT; otherwise it is reported as a conflict.
+    # Returns a BulkRowStatus per row. An id in products_archive is refused so
+    # the product can still be archived later.
+    async def bulk_upsert(self, chunk: list) -> list:
+        given_ids = sorted({product.productId for _, product in chunk if product.productId is not None})
+        to_insert = [(number, product) for number, product in chunk if product.productId is None]
+        row_sql = "(" + ", ".join(["%s"] * (len(BULK_COLUMNS) + 1)) + ")"
+        statuses = []
+
+        async with self.transaction():
+            versions = {}
+            archived = set()
+            if given_ids:
+                placeholders = ", ".join(["%s"] * len(given_ids))
+                rows = await self.fetchall(LOCK_EXISTING.format(placeholders=placeholders), given_ids)
+                versions = {row["productId"]: row["rowVersion"] for row in rows}
+                rows = await self.fetchall(SELECT_ARCHIVED.format(placeholders=placeholders), given_ids)
+                archived = {row["productId"] for row in rows}
+
+            # the rows are locked, so checking their versions here is a compare-and-swap
+            to_upsert = []
+            seen = set()
+            for number, product in chunk:
+                if product.productId is None:
+                    continue
+                error = _bulk_conflict(product, versions, archived, seen)
+                seen.add(product.productId)
+                if error:
+                    statuses.append(BulkRowStatus(
+                        row=number, status="conflict", productId=product.productId,
+                        rowVersion=versions.get(product.productId), errors=[error],
+                    ))
+                else:
+                    to_upsert.append((number, product))
+
+            created_ids = []
+            if to_insert:
+                sql = BULK_INSERT.format(columns=", ".join(BULK_COLUMNS), rows=", ".join([row_sql] * len(to_insert)))
+                params = [value for _, product in to_insert for value in _bulk_values(product)]
+                _, first_id = await self.execute(sql, params)
+                created_ids = await self._inserted_ids(first_id, [product for _, product in to_insert])
+
+            if to_upsert:
+                sql = BULK_UPSERT.format(
+                    columns=", ".join(BULK_COLUMNS),
+                    rows=", ".join(["(%s, " + row_sql[1:]] * len(to_upsert)),
+                    assignments=", ".join(f"{column} = VALUES({column})" for column in BULK_COLUMNS),
+                )
+                params = [value for _, product in to_upsert for value in (product.productId, *_bulk_values(product))]
+                await self.execute(sql, params)
+
+        for (number, product), product_id in zip(to_insert, created_ids):
+            statuses.append(BulkRowStatus(row=number, status="created", productId=product_id, rowVersion=0))
+            self._after_bulk_write(product, product_id, 0)
+        for number, product in to_upsert:
+            current = versions.get(product.productId)
+            version = 0 if current is None else current + 1
+            statuses.append(BulkRowStatus(
+                row=number, status="created" if current is None else "updated",
+                productId=product.productId, rowVersion=version,
+            ))
+            self._after_bulk_write(product, product.productId, version)
+        return statuses
+
+    # Ids of the rows one multi-row INSERT created, in insert order. With
+    # innodb_autoinc_lock_mode 2 they need not be consecutive, but they are
+    # increasing and start at `first_id`; rows other sessions inserted in
+    # between are told apart by their natural key.
+    async def _inserted_ids(self, first_id: int, products: list) -> list:
+        waiting = {}
+        for index, product in enumerate(products):
+            waiting.setdefault(_natural_key(product), []).append(index)
+        ids = [None] * len(products)
+        remaining = len(products)
+        for row in await self.fetchall(SELECT_INSERTED, (first_id,)):
+            indexes = waiting.get(_natural_key(row))
+            if indexes:
+                ids[indexes.pop(0)] = row["productId"]
+                remaining -= 1
+                if not remaining:
+                    break
+        return ids
+
+    def _after_bulk_write(self, product: ProductImport, product_id: int, version: int):
+        created = version == 0
+        if created:
+            invalidate_new_product(product)
+        else:
+            invalidate_changed_product(product_id, product)
+        row = product.model_dump()
+        row.update(productId=product_id, rowVersion=version)
+        if inventory_index.ready:
+            inventory_index.upsert(row, keep_sold=not created)
+        if product_index.ready:
+            current = None if created else product_index.get(product_id)
+            if current is not None:
+                # sold is not written by an update, keep the indexed count
+                row = dict(row, sold=current["sold"])
+            product_index.upsert(row)
+
+    # Load every product into the in-process search index, called from the app lifespan
+    async def load_search_index(self):
+        product_index.load(await self.fetchall_products())
+
+    async def fetchall_products(self) -> list:
+        return await self.fetchall(SELECT_ALL_PRODUCTS)
+
+    async def fingerprint(self) -> tuple:
+        row = await self.fetchone(SELECT_FINGERPRINT)
+        return int(row["products"]), int(row["highest"]), int(row["versions"]), str(row["today"])
+
+    # Load every product's stock level into the inventory index, called from the app lifespan
+    async def load_inventory_index(self):
+        inventory_index.load(await self.fetchall_stock_levels())
+
+    async def fetchall_stock_levels(self) -> list:
+        return await self.fetchall(SELECT_STOCK_LEVELS)
+
+    # A seller's products with fewer than `below` units (all of them when None),
+    # lowest stock first; served from the inventory index once it is warmed
+    async def stock_levels(self, seller_id: int, below: Optional[int] = None) -> list:
+        if inventory_index.ready:
+            if below is None:
+                return inventory_index.by_seller(seller_id)
+            return inventory_index.below(seller_id, below)
+        # productQuantity is a signed INT, so this bound admits every row
+        return await self.fetchall(SELECT_SELLER_STOCK, (seller_id, 2 ** 31 - 1 if below is None else below))
+
+    # Search served from the in-process index, or from MySQL FULLTEXT until it is warmed
+    async def search(self, q=None, prefix=None, category=None, min_price=None, max_price=None,
+                     expires_after=None, expires_before=None, sort="relevance", limit=20, offset=0) -> dict:
+        # the in-process equivalent of the ACTIVE predicate
+        today = date.today()
+        if expires_after is None or expires_after < today:
+            expires_after = today
+        if product_index.ready:
+            total, rows, facets = product_index.search(
+                q, prefix, category, min_price, max_price, expires_after, expires_before, sort, limit, offset
+            )
+            return {"total": total, "items": product_rows.rows(rows), "facets": facets}
+
+        conditions, params = self.search_conditions(q, prefix, min_price, max_price, expires_after, expires_before)
+        where = " AND ".join(conditions) or "1 = 1"
+        facet_rows = await self.fetchall(
+            f"SELECT productCategory, COUNT(*) AS matches FROM products WHERE {where} GROUP BY productCategory", params
+        )
+        facets = {row["productCategory"]: row["matches"] for row in facet_rows}
+        total = facets.get(category, 0) if category is not None else sum(facets.values())
+
+        if category is not None:
+            where += " AND productCategory = %s"
+            params = params + [category]
+        order = SEARCH_ORDER[sort]
+        if sort == "relevance" and q:
+            order = "MATCH (productName, productCategory) AGAINST (%s IN BOOLEAN MODE) DESC, productId"
+            params = params + [_boolean_query(q)]
+        rows = await self.fetchall(
+            f"SELECT * FROM products WHERE {where} ORDER BY {order} LIMIT %s OFFSET %s", params + [limit, offset]
+        )
+        return {"total": total, "items": product_rows.rows(rows), "facets": facets}
+
+    # WHERE clauses shared by the fallback search and its facet counts (everything but category)
+    @staticmethod
+    def search_conditions(q, prefix, min_price, max_price, expires_after, expires_before):
+        conditions = []
+        params = []
+        if q:
+            conditions.append("MATCH (productName, productCategory) AGAINST (%s IN BOOLEAN MODE)")
+            params.append(_boolean_query(q))
+        if prefix:
+            escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append("productName LIKE %s")
+            params.append(escaped + "%")
+        if min_price is not None:
+            conditions.append("productPrice >= %s")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append("productPrice <= %s")
+            params.append(max_price)
+        if expires_after is not None:
+            conditions.append("productExpiry > %s")
+            params.append(expires_after)
+        if expires_before is not None:
+            conditions.append("productExpiry <= %s")
+            params.append(expires_before)
+        return conditions, params
+
+
+# "+apple +gree*": every word required, the last one as a prefix, like the in-process index
+def _boolean_query(q: str) -> str:
+    tokens = tokenize(q)
+    return " ".join(f"+{token}*" if i == len(tokens) - 1 else f"+{token}" for i, token in enumerate(tokens))
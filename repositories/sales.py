@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+
+from database.database import InstrumentedSSDictCursor
+from database.rollup import UPSERT_SALES_DAILY, sales_daily_rows
+from models.sales import SaleLine, SaleLineResult, Sales
+from repositories.base import Repository
+from services.cache import invalidate_product_stock
+from services.inventory import inventory_index
+from services.pagination import fetch_page
+from services.search import product_index
+
+SALES_COLUMNS = list(Sales.model_fields)
+
+SELECT_SALE = "SELECT * FROM sales WHERE SalesNumber = %s"
+SELECT_BY_SELLER = "SELECT * FROM sales WHERE sellerId = %s"
+SELECT_BY_CUSTOMER = "SELECT * FROM sales WHERE customerId = %s"
+LOCK_STOCK = "SELECT productId, productQuantity FROM products WHERE productId IN ({placeholders}) FOR UPDATE"
+DECREMENT_STOCK = """
+    UPDATE products SET productQuantity = productQuantity - %s, sold = sold + %s, rowVersion = rowVersion + 1
+    WHERE productId = %s AND productQuantity >= %s
+"""
+INSERT_SALE = """
+    INSERT INTO sales (sellerId, customerId, quantity, salesDate, price, productId)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+INSERT_RESERVATION = "INSERT INTO sales_reservations (reservationId) VALUES (%s)"
+LOCK_RESERVATIONS = "SELECT reservationId FROM sales_reservations WHERE reservationId IN ({placeholders}) FOR UPDATE"
+DELETE_RESERVATIONS = "DELETE FROM sales_reservations WHERE reservationId IN ({placeholders})"
+
+
+class StockConflict(Exception):
+    """A guarded stock decrement matched no row even though the row was locked."""
+
+
+class SalesRepository(Repository):
+
+    async def page(self, page: dict):
+        return await fetch_page(self.fetchall, "sales", "SalesNumber", SALES_COLUMNS, page)
+
+    async def get(self, sales_number: int):
+        return await self.fetchone(SELECT_SALE, (sales_number,))
+
+    async def by_seller(self, seller_id: int) -> list:
+        return await self.fetchall(SELECT_BY_SELLER, (seller_id,))
+
+    async def by_customer(self, customer_id: int) -> list:
+        return await self.fetchall(SELECT_BY_CUSTOMER, (customer_id,))
+
+    # Record every line of a cart in one transaction. Stock rows are locked in
+    # productId order (so concurrent carts cannot deadlock), each product is
+    # decremented with a guarded UPDATE, the sales rows go in with a single
+    # executemany and the daily rollup is bumped alongside them. Returns the
+    # per-line results and whether the cart committed. With a `reservation` id
+    # only the stock is reserved, together with a sales_reservations row, and
+    # the caller records the sales later through record_sales (the write-behind
+    # queue).
+    async def checkout(self, customer_id: int, sales_date: datetime, items: List[SaleLine], reservation: Optional[str] = None):
+        demand = defaultdict(int)
+        for item in items:
+            demand[item.productId] += item.quantity
+        product_ids = sorted(demand)
+
+        async with self.transaction():
+            placeholders = ", ".join(["%s"] * len(product_ids))
+            rows = await self.fetchall(LOCK_STOCK.format(placeholders=placeholders), product_ids)
+            stock = {row["productId"]: row["productQuantity"] for row in rows}
+
+            results = []
+            for item in items:
+                available = stock.get(item.productId)
+                if available is None:
+                    status = "not_found"
+                elif demand[item.productId] > available:
+                    status = "insufficient_stock"
+                else:
+                    status = "ok"
+                results.append(SaleLineResult(productId=item.productId, quantity=item.quantity, status=status, available=available))
+
+            if any(result.status != "ok" for result in results):
+                # nothing has been written yet, leaving the block commits an empty transaction
+                return results, False
+
+            for product_id in product_ids:
+                quantity = demand[product_id]
+                rowcount, _ = await self.execute(DECREMENT_STOCK, (quantity, quantity, product_id, quantity))
+                if rowcount != 1:
+                    raise StockConflict(f"Stock changed for product {product_id}")
+
+            if reservation is not None:
+                await self.execute(INSERT_RESERVATION, (reservation,))
+            else:
+                await self.executemany(
+                    INSERT_SALE,
+                    [(item.sellerId, customer_id, item.quantity, sales_date, item.price, item.productId) for item in items],
+                )
+                await self.executemany(UPSERT_SALES_DAILY, sales_daily_rows(sales_date, items))
+
+        for product_id in product_ids:
+            invalidate_product_stock(product_id)
+            product_index.add_sold(product_id, demand[product_id])
+            inventory_index.add_sold(product_id, demand[product_id])
+        return results, True
+
+    # Insert sales whose stock was reserved by checkout(reservation=...), plus
+    # their rollup rows, in one transaction. Each sale is a (reservation,
+    # customer_id, sales_date, SaleLine). Only sales whose reservation still
+    # exists are written and the reservations are consumed, so replaying a
+    # batch is harmless and a reservation that never committed writes nothing.
+    # Returns the number of sales written.
+    async def record_sales(self, sales: list) -> int:
+        reservations = sorted({sale[0] for sale in sales})
+        if not reservations:
+            return 0
+        placeholders = ", ".join(["%s"] * len(reservations))
+        async with self.transaction():
+            rows = await self.fetchall(LOCK_RESERVATIONS.format(placeholders=placeholders), reservations)
+            reserved = {row["reservationId"] for row in rows}
+            sales = [sale for sale in sales if sale[0] in reserved]
+            if not sales:
+                return 0
+            await self.executemany(
+                INSERT_SALE,
+                [(item.sellerId, customer_id, item.quantity, sales_date, item.price, item.productId) for _, customer_id, sales_date, item in sales],
+            )
+            await self.executemany(
+                UPSERT_SALES_DAILY,
+                [row for _, _, sales_date, item in sales for row in sales_daily_rows(sales_date, [item])],
+            )
+            reserved = sorted(reserved)
+            await self.execute(DELETE_RESERVATIONS.format(placeholders=", ".join(["%s"] * len(reserved))), reserved)
+        return len(sales)
+
+    # SQL for an export filtered by seller, customer and salesDate range
+    @staticmethod
+    def export_query(seller_id: Optional[int], customer_id: Optional[int], start: Optional[datetime], end: Optional[datetime]):
+        conditions = []
+        params = []
+        if seller_id is not None:
+            conditions.append("sellerId = %s")
+            params.append(seller_id)
+        if customer_id is not None:
+            conditions.append("customerId = %s")
+            params.append(customer_id)
+        if start is not None:
+            conditions.append("salesDate >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append("salesDate < %s")
+            params.append(end)
+
+        sql = f"SELECT {', '.join(SALES_COLUMNS)} FROM sales"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY SalesNumber"
+        return sql, tuple(params)
+
+    # Yield batches of rows from an unbuffered server-side cursor. If the caller
+    # stops early the connection must be closed rather than reused, because
+    # closing the cursor would drain every remaining row first.
+    async def iter_export(self, sql: str, params: tuple, batch_size: int):
+        cursor = await self.connection.cursor(InstrumentedSSDictCursor)
+        await cursor.execute(sql, params)
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        await cursor.close()
@@ -0,0 +1,40 @@
+from models.seller import Seller
+from repositories.base import Repository
+from services.pagination import fetch_page
+
+# Columns a listing may return; the password hash is never selectable
+SELLER_COLUMNS = [field for field in Seller.model_fields if field != "sellerPassword"]
+
+INSERT_SELLER = """
+    INSERT INTO seller (sellerId, sellerName, sellerEmail, sellerPassword)
+    VALUES (%s, %s, %s, %s)
+"""
+SELECT_SELLER = "SELECT * FROM seller WHERE sellerId = %s"
+UPDATE_SELLER = """
+    UPDATE seller SET sellerName = %s, sellerEmail = %s, sellerPassword = %s
+    WHERE sellerId = %s
+"""
+DELETE_SELLER = "DELETE FROM seller WHERE sellerId = %s"
+
+
+class SellerRepository(Repository):
+
+    async def create(self, seller: Seller, hashed_password: str):
+        await self.execute(INSERT_SELLER, (seller.sellerId, seller.sellerName, seller.sellerEmail, hashed_password))
+        await self.connection.commit()
+
+    async def page(self, page: dict):
+        return await fetch_page(self.fetchall, "seller", "sellerId", SELLER_COLUMNS, page)
+
+    async def get(self, seller_id: int):
+        return await self.fetchone(SELECT_SELLER, (seller_id,))
+
+    async def update(self, seller_id: int, seller: Seller, hashed_password: str) -> bool:
+        rowcount, _ = await self.execute(UPDATE_SELLER, (seller.sellerName, seller.sellerEmail, hashed_password, seller_id))
+        await self.connection.commit()
+        return rowcount > 0
+
+    async def delete(self, seller_id: int) -> bool:
+        rowcount, _ = await self.execute(DELETE_SELLER, (seller_id,))
+        await self.connection.commit()
+        return rowcount > 0
@@ -0,0 +1,59 @@
+from datetime import date
+from typing import List, Literal, Optional
+
+import aiomysql
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from models.analytics import CategoryTotal, ProductTotal, RevenueBucket
+from repositories.analytics import AnalyticsRepository
+from repositories.base import provide_read
+
+router = APIRouter()
+
+# reporting reads go to a replica when one is configured
+get_analytics = provide_read(AnalyticsRepository)
+
+
+# Shared sellerId / date-range filter
+def sales_filter(
+    seller_id: Optional[int] = Query(None, alias="sellerId", description="Restrict to one seller, whole store if omitted"),
+    start: Optional[date] = Query(None, description="Include sales on or after this day"),
+    end: Optional[date] = Query(None, description="Include sales before this day"),
+):
+    return {"seller_id": seller_id, "start": start, "end": end}
+
+
+@router.get("/analytics/revenue", response_model=List[RevenueBucket], tags=["Analytics"])
+async def get_revenue(
+    granularity: Literal["day", "week", "month"] = Query("day"),
+    filters: dict = Depends(sales_filter),
+    analytics: AnalyticsRepository = Depends(get_analytics),
+):
+    try:
+        return [RevenueBucket(**row) for row in await analytics.revenue(granularity, **filters)]
+    except aiomysql.Error as err:
+        print(f"Error computing revenue: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/analytics/top-products", response_model=List[ProductTotal], tags=["Analytics"])
+async def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    by: Literal["revenue", "units"] = Query("revenue"),
+    filters: dict = Depends(sales_filter),
+    analytics: AnalyticsRepository = Depends(get_analytics),
+):
+    try:
+        return [ProductTotal(**row) for row in await analytics.top_products(limit, by, **filters)]
+    except aiomysql.Error as err:
+        print(f"Error computing top products: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/analytics/categories", response_model=List[CategoryTotal], tags=["Analytics"])
+async def get_category_totals(filters: dict = Depends(sales_filter), analytics: AnalyticsRepository = Depends(get_analytics)):
+    try:
+        return [CategoryTotal(**row) for row in await analytics.category_totals(**filters)]
+    except aiomysql.Error as err:
+        print(f"Error computing category totals: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
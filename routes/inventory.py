@@ -0,0 +1,74 @@
+import asyncio
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import aiomysql
+
+from models.inventory import StockLevel
+from repositories.base import provide_read
+from repositories.products import ProductRepository
+from services.inventory import inventory_index
+from services.serialization import TrustedJSONResponse, dumps
+
+router = APIRouter()
+
+get_products_read = provide_read(ProductRepository)
+
+# Seconds between keep-alive comments on an idle stock stream
+INVENTORY_HEARTBEAT = float(os.getenv("INVENTORY_HEARTBEAT", "15"))
+
+
+@router.get("/inventory/sellers/{seller_id}", response_model=List[StockLevel], tags=["Inventory"])
+async def get_seller_inventory(
+    seller_id: int,
+    below: Optional[int] = Query(None, description="Only products with fewer units than this"),
+    sold_out: bool = Query(False, alias="soldOut", description="Only products with no units left"),
+    products: ProductRepository = Depends(get_products_read),
+):
+    if sold_out:
+        below = 1 if below is None else min(below, 1)
+    try:
+        return TrustedJSONResponse(await products.stock_levels(seller_id, below))
+
+    except aiomysql.Error as err:
+        print(f"Error retrieving inventory: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def _event(name: str, data) -> bytes:
+    return b"event: " + name.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+# A snapshot of the seller's stock, then one event per change; ends when the
+# client disconnects or falls too far behind (EventSource then reconnects)
+async def _stock_events(request: Request, seller_id: int):
+    subscription = inventory_index.subscribe(seller_id)
+    try:
+        yield _event("snapshot", inventory_index.by_seller(seller_id))
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=INVENTORY_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            event, entry = message
+            yield _event(event, entry)
+    finally:
+        inventory_index.unsubscribe(subscription)
+
+
+@router.get("/inventory/sellers/{seller_id}/stream", tags=["Inventory"])
+async def stream_seller_inventory(seller_id: int, request: Request):
+    if not inventory_index.ready:
+        raise HTTPException(status_code=503, detail="Inventory index is not enabled")
+    return StreamingResponse(
+        _stock_events(request, seller_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,56 +1,71 @@
-from fastapi import APIRouter, HTTPException, Depends
-import bcrypt
+from fastapi import APIRouter, HTTPException, Depends, Request
 
-from database.database import get_connection
-from models.customer import Customer
-from models.seller import Seller
+from database.database import STICKY_COOKIE, acquire_read_connection, release_connection
+from repositories.credentials import CredentialRepository
+from services.password import verify_password_or_dummy
+from services.rate_limit import check_login
+from services.session import login_response, require_session
 
 router = APIRouter()
 
-# Function to hash the password
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
-
-# Function to verify the password
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
-
-# Authenticate customer
-async def authenticate_customer(customer_email: str, password: str, conn):
-    async with conn.cursor() as cursor:
-        await cursor.execute("SELECT * FROM customer WHERE customerEmail = %s", (customer_email,))
-        customer = await cursor.fetchone()
-        if not customer:
-            return None
-        if not verify_password(password, customer["customerPassword"]):
-            return None
-        return Customer(**customer)
-
-# Authenticate seller
-async def authenticate_seller(seller_email: str, password: str, conn):
-    async with conn.cursor() as cursor:
-        await cursor.execute("SELECT * FROM seller WHERE sellerEmail = %s", (seller_email,))
-        seller = await cursor.fetchone()
-        if not seller:
-            return None
-        if not verify_password(password, seller["sellerPassword"]):
-            return None
-        return Seller(**seller)
+
+def _enforce_login_limit(role: str, email: str, request: Request):
+    retry_after = check_login(role, email, request.client.host if request.client else "")
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers={"Retry-After": str(retry_after)})
+
+
+# Rate limits run as dependencies ahead of the handler, so a rejected attempt
+# costs neither a pooled connection nor a bcrypt check
+def customer_login_limit(customer_email: str, request: Request):
+    _enforce_login_limit("customer", customer_email, request)
+
+
+def seller_login_limit(seller_email: str, request: Request):
+    _enforce_login_limit("seller", seller_email, request)
+
+# Authenticate a customer or seller: id on success, None otherwise. The
+# connection is only held for the lookup, not for the bcrypt check, and unknown
+# emails still pay for one bcrypt check so response time does not reveal them.
+# The lookup reads from a replica unless the client has just written.
+async def authenticate(role: str, email: str, password: str, sticky: bool = False):
+    connection = await acquire_read_connection(sticky)
+    try:
+        account = await CredentialRepository(connection).lookup(role, email)
+    finally:
+        await release_connection(connection)
+    password_hash = account["passwordHash"] if account else None
+    if not await verify_password_or_dummy(password, password_hash):
+        return None
+    return account["accountId"]
 
 # Login for customer
 @router.post("/customers/login",tags=["login"])
-async def customer_login(customer_email: str, password: str, conn=Depends(get_connection)):
-    customer = await authenticate_customer(customer_email, password, conn)
-    if not customer:
+async def customer_login(
+    customer_email: str,
+    password: str,
+    request: Request,
+    _limit=Depends(customer_login_limit),
+):
+    customer_id = await authenticate("customer", customer_email, password, STICKY_COOKIE in request.cookies)
+    if customer_id is None:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    return {"message": "Customer logged in successfully"}
+    return login_response("customer", customer_id, "Customer logged in successfully")
 
 # Login for seller
 @router.post("/sellers/login",tags=["login"])
-async def seller_login(seller_email: str, password: str, conn=Depends(get_connection)):
-    seller = await authenticate_seller(seller_email, password, conn)
-    if not seller:
+async def seller_login(
+    seller_email: str,
+    password: str,
+    request: Request,
+    _limit=Depends(seller_login_limit),
+):
+    seller_id = await authenticate("seller", seller_email, password, STICKY_COOKIE in request.cookies)
+    if seller_id is None:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    return {"message": "Seller logged in successfully"}
+    return login_response("seller", seller_id, "Seller logged in successfully")
+
+# Current session, verified from the bearer token alone
+@router.get("/session",tags=["login"])
+async def get_session(claims: dict = Depends(require_session())):
+    return claims
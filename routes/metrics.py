@@ -0,0 +1,60 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database import database
+from services import metrics
+from services.cache import catalog_cache
+from services.inventory import inventory_index
+from services.write_behind import sales_write_behind
+
+router = APIRouter()
+
+
+def _pool_stats():
+    pool = database._pool
+    if pool is None:
+        return {}
+    return {("size",): pool.size, ("free",): pool.freesize, ("max",): pool.maxsize}
+
+
+def _replica_stats():
+    stats = {}
+    for replica in database.replicas():
+        stats[(replica.name, "healthy")] = int(replica.healthy)
+        if replica.lag is not None:
+            stats[(replica.name, "lag_seconds")] = replica.lag
+    return stats
+
+
+def _cache_stats():
+    stats = catalog_cache.stats()
+    return {(name,): stats[name] for name in ("size", "hits", "misses", "evictions", "expirations", "invalidations")}
+
+
+def _sales_queue_stats():
+    if not sales_write_behind.running:
+        return {}
+    return {
+        ("queued",): sales_write_behind.depth(),
+        ("flushed_batches",): sales_write_behind.flushed_batches,
+        ("flushed_sales",): sales_write_behind.flushed_sales,
+        ("dead_lettered",): sales_write_behind.dead_lettered,
+    }
+
+
+def _inventory_stats():
+    if not inventory_index.ready:
+        return {}
+    return {("products",): inventory_index.size(), ("subscribers",): inventory_index.subscriber_count()}
+
+
+metrics.register(metrics.Gauge("db_pool_connections", "Connections in the pool by state", _pool_stats, ("state",)))
+metrics.register(metrics.Gauge("db_replica", "Replica rotation state and replication lag", _replica_stats, ("replica", "stat")))
+metrics.register(metrics.Gauge("catalog_cache", "Catalog cache size and counters", _cache_stats, ("stat",)))
+metrics.register(metrics.Gauge("sales_write_behind", "Write-behind sales queue depth, flush and dead-letter counters", _sales_queue_stats, ("stat",)))
+metrics.register(metrics.Gauge("inventory_index", "Products in the inventory index and open stock streams", _inventory_stats, ("stat",)))
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Metrics"])
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
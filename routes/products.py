@@ -1,183 +1,251 @@
-from typing import List
-from fastapi import APIRouter, Body, HTTPException
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response
 import aiomysql
-from datetime import datetime
-
-from database.database import close_connection, get_connection
-from models.product import Product
+from datetime import date
+
+from models.page import Page
+from models.product import BulkImportResult, BulkRowStatus, Product, ProductPatch
+from models.search import ProductSearchResult
+from database.database import acquire_connection, release_connection
+from repositories.base import provide, provide_read
+from repositories.products import ProductRepository, VersionConflict
+from services.bulk_import import BulkParseError, iter_chunks, iter_csv_rows, iter_json_items, validate_chunk
+from services.cache import catalog_cache, products_version
+from services.conditional import not_modified, parse_row_etag, row_etag
+from services.pagination import page_params
+from services.serialization import TrustedJSONResponse
 
 router = APIRouter()
 
-def dict_to_product(data):
-    if data:
-        return Product(**data)
-    return None
+get_products = provide(ProductRepository)
+get_products_read = provide_read(ProductRepository)
+
+
+# If-Match carries the product's ETag from GET /products/{product_id}, or for
+# older clients its bare rowVersion, quoted or not; "*" or no header gives None
+def if_match_version(
+    product_id: int,
+    if_match: Optional[str] = Header(None, description="ETag of the product version the update applies to"),
+) -> Optional[int]:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    row = parse_row_etag(if_match)
+    if row is not None:
+        if row[0] != product_id:
+            raise HTTPException(status_code=412, detail="If-Match is the ETag of another product")
+        return row[1]
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be the product's ETag")
+
+
+# A replica read that may predate this process's last write must not carry
+# that write's validators, or clients would keep revalidating stale rows as fresh
+def _response_headers(products: ProductRepository, headers: dict) -> dict:
+    return {"Cache-Control": "no-cache"} if products.possibly_stale else headers
+
 
-@router.get("/products", response_model=List[Product], tags=["Products"])
-async def get_all_products():
-    connection = await get_connection()
-    cursor = await connection.cursor()
+def _version_conflict(err: VersionConflict):
+    return HTTPException(status_code=409, detail={"message": "Product was modified by another request", "rowVersion": err.current})
 
+
+@router.get("/products", response_model=Page, tags=["Products"])
+async def get_all_products(request: Request, page: dict = Depends(page_params), products: ProductRepository = Depends(get_products_read)):
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        await cursor.execute("SELECT * FROM products WHERE productExpiry > %s", (today,))
-        products = await cursor.fetchall()
-        return [dict_to_product(product) for product in products]
+        unchanged, headers = not_modified(request, products_version)
+        if unchanged:
+            return unchanged
+
+        result = await products.active_page(page)
+        return TrustedJSONResponse(result, headers=_response_headers(products, headers))
 
     except aiomysql.Error as err:
         print(f"Error retrieving products: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
+# Declared before /products/{product_id} so "search" is not parsed as an id
+@router.get("/products/search", response_model=ProductSearchResult, tags=["Products"])
+async def search_products(
+    q: Optional[str] = Query(None, description="Words to match in name or category, the last one as a prefix"),
+    prefix: Optional[str] = Query(None, description="Start of the product name"),
+    category: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None, alias="minPrice", ge=0),
+    max_price: Optional[float] = Query(None, alias="maxPrice", ge=0),
+    expires_after: Optional[date] = Query(None, alias="expiresAfter", description="Only products expiring after this day"),
+    expires_before: Optional[date] = Query(None, alias="expiresBefore", description="Only products expiring on or before this day"),
+    sort: Literal["relevance", "price_asc", "price_desc", "sold"] = Query("relevance"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    products: ProductRepository = Depends(get_products_read),
+):
+    try:
+        result = await products.search(
+            q, prefix, category, min_price, max_price,
+            expires_after, expires_before, sort, limit, offset,
+        )
+        return TrustedJSONResponse(result)
 
-@router.get("/products/{product_id}", response_model=Product, tags=["Products"])
-async def get_product(product_id: int):
-    connection = await get_connection()
-    cursor = await connection.cursor()
+    except aiomysql.Error as err:
+        print(f"Error searching products: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@router.get("/products/{product_id}", response_model=Product, tags=["Products"])
+async def get_product(product_id: int, request: Request, products: ProductRepository = Depends(get_products_read)):
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        await cursor.execute("SELECT * FROM products WHERE productId = %s AND productExpiry > %s", (product_id, today))
-        product = await cursor.fetchone()
+        product = await products.get_active(product_id)
 
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        return dict_to_product(product)
+        # the row's own version, so the ETag works as If-Match on PUT and PATCH
+        unchanged, headers = not_modified(request, products_version, row_etag(product_id, product["rowVersion"]))
+        if unchanged and not products.possibly_stale:
+            return unchanged
+
+        return TrustedJSONResponse(product, headers=_response_headers(products, headers))
 
     except aiomysql.Error as err:
         print(f"Error retrieving product: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
-
-@router.get("/products/{seller_id}", response_model=List[Product], tags=["Products"])
-async def get_products_by_seller(seller_id: int):
-    connection = await get_connection()
-    cursor = await connection.cursor()
-
+# Two path segments, so it is not shadowed by /products/{product_id}
+@router.get("/products/seller/{seller_id}", response_model=List[Product], tags=["Products"])
+async def get_products_by_seller(seller_id: int, products: ProductRepository = Depends(get_products_read)):
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        await cursor.execute("SELECT * FROM products WHERE sellerId = %s AND productExpiry > %s", (seller_id, today))
-        products = await cursor.fetchall()
+        seller_products = await products.active_by_seller(seller_id)
 
-        if not products:
+        if not seller_products:
             raise HTTPException(status_code=404, detail="No products found for the seller")
 
-        return [dict_to_product(product) for product in products]
+        return TrustedJSONResponse(seller_products)
 
     except aiomysql.Error as err:
         print(f"Error retrieving products: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
-
 @router.post("/products/create", response_model=Product, tags=["Products"])
-async def create_product(product: Product = Body(...)):
-    connection = await get_connection()
-    cursor = await connection.cursor()
-
+async def create_product(product: Product = Body(...), products: ProductRepository = Depends(get_products)):
     try:
-        sql = """
-            INSERT INTO products (
-                productName, productQuantity, productImage, productPrice,
-                productMake, productExpiry, productCategory, sellerId, sold
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        await cursor.execute(sql, (
-            product.productName,
-            product.productQuantity,
-            product.productImage,
-            product.productPrice,
-            product.productMake,
-            product.productExpiry,
-            product.productCategory,
-            product.sellerId,
-            product.sold
-        ))
-
-        await connection.commit()
-
-        product_id = cursor.lastrowid
-
-        # Fetch the newly created product
-        await cursor.execute("SELECT * FROM products WHERE productId = %s", (product_id,))
-        new_product = await cursor.fetchone()
-
-        if not new_product:
-            raise HTTPException(status_code=404, detail="Newly created product not found")
-
-        return dict_to_product(new_product)
+        return await products.create(product)
 
     except aiomysql.Error as err:
         print(f"Error creating product: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
+def _bulk_report(statuses: list) -> BulkImportResult:
+    statuses.sort(key=lambda status: status.row)
+    counts = {status: sum(1 for row in statuses if row.status == status) for status in ("created", "updated", "conflict", "invalid", "failed")}
+    return BulkImportResult(**counts, rows=statuses)
+
+# Upsert many products from a JSON array or a CSV file (header row of Product
+# field names), streamed and written in chunks of BULK_CHUNK_SIZE rows, each in
+# its own transaction. Updating an existing product needs its rowVersion, like
+# PUT. A chunk that fails to write is reported as failed and the import
+# carries on with the next one. A connection is only held while a chunk is
+# written, so a slow upload does not keep one from the pool.
+@router.post(
+    "/products/bulk",
+    response_model=BulkImportResult,
+    tags=["Products"],
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+        "text/csv": {"schema": {"type": "string"}},
+    }}},
+)
+async def bulk_import_products(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        rows = iter_csv_rows(request.stream())
+    elif content_type in ("application/json", ""):
+        rows = iter_json_items(request.stream())
+    else:
+        raise HTTPException(status_code=415, detail="Send a JSON array (application/json) or a CSV file (text/csv)")
+
+    statuses = []
+    try:
+        async for chunk in iter_chunks(rows):
+            valid, invalid = validate_chunk(chunk)
+            statuses.extend(invalid)
+            if not valid:
+                continue
+            try:
+                connection = await acquire_connection()
+                try:
+                    statuses.extend(await ProductRepository(connection).bulk_upsert(valid))
+                finally:
+                    await release_connection(connection)
+            except aiomysql.Error as err:
+                print(f"Error importing products: {err}")
+                statuses.extend(
+                    BulkRowStatus(row=number, status="failed", productId=product.productId, errors=["Database error, chunk rolled back"])
+                    for number, product in valid
+                )
+    except BulkParseError as err:
+        # chunks before the parse error are already committed; say which
+        raise HTTPException(status_code=400, detail={"message": str(err), "report": _bulk_report(statuses).model_dump()})
+
+    return _bulk_report(statuses)
 
 @router.put("/products/{product_id}", response_model=Product, tags=["Products"])
-async def update_product(product_id: int, product: Product = Body(...)):
-    connection = await get_connection()
-    cursor = await connection.cursor()
-
+async def update_product(
+    product_id: int,
+    response: Response,
+    product: Product = Body(...),
+    expected_version: Optional[int] = Depends(if_match_version),
+    products: ProductRepository = Depends(get_products),
+):
     try:
-        sql = """
-            UPDATE products SET
-                productName = %s,
-                productQuantity = %s,
-                productImage = %s,
-                productPrice = %s,
-                productMake = %s,
-                productExpiry = %s,
-                productCategory = %s,
-                sellerId = %s,
-                sold = %s
-            WHERE productId = %s
-        """
-
-        await cursor.execute(sql, (
-            product.productName,
-            product.productQuantity,
-            product.productImage,
-            product.productPrice,
-            product.productMake,
-            product.productExpiry,
-            product.productCategory,
-            product.sellerId,
-            product.sold,
-            product_id
-        ))
-
-        await connection.commit()
-
-        if cursor.rowcount == 0:
+        # without If-Match the rowVersion echoed back in the body is the precondition;
+        # a PUT with neither would overwrite stock and sold counts blindly
+        if expected_version is None:
+            expected_version = product.rowVersion
+        if expected_version is None:
+            raise HTTPException(status_code=428, detail="Send If-Match or rowVersion with the rowVersion last read")
+        updated = await products.update(product_id, product, expected_version)
+
+        if updated is None:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        return await get_product(product_id)
+        response.headers["ETag"] = row_etag(product_id, updated.rowVersion)
+        return updated
+
+    except VersionConflict as err:
+        raise _version_conflict(err)
 
     except aiomysql.Error as err:
         print(f"Error updating product: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
+@router.patch("/products/{product_id}", response_model=Product, tags=["Products"])
+async def patch_product(
+    product_id: int,
+    changes: ProductPatch = Body(...),
+    expected_version: Optional[int] = Depends(if_match_version),
+    products: ProductRepository = Depends(get_products),
+):
+    try:
+        patched = await products.patch(product_id, changes.model_dump(exclude_unset=True, exclude_none=True), expected_version)
 
-@router.delete("/products/{product_id}", response_model=dict, tags=["Products"])
-async def delete_product(product_id: int):
-    connection = await get_connection()
-    cursor = await connection.cursor()
+        if patched is None:
+            raise HTTPException(status_code=404, detail="Product not found")
 
-    try:
-        await cursor.execute("DELETE FROM products WHERE productId = %s", (product_id,))
+        return TrustedJSONResponse(patched, headers={"ETag": row_etag(product_id, patched["rowVersion"])})
 
-        await connection.commit()
+    except VersionConflict as err:
+        raise _version_conflict(err)
+
+    except aiomysql.Error as err:
+        print(f"Error updating product: {err}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
 
-        if cursor.rowcount == 0:
+@router.delete("/products/{product_id}", response_model=dict, tags=["Products"])
+async def delete_product(product_id: int, products: ProductRepository = Depends(get_products)):
+    try:
+        if not await products.delete(product_id):
             raise HTTPException(status_code=404, detail="Product not found")
 
         return {"message": "Product deleted successfully"}
@@ -186,53 +254,37 @@ async def delete_product(product_id: int):
         print(f"Error deleting product: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
-
 
 @router.get("/products/category/{category}", response_model=List[Product], tags=["Category"])
-async def get_products_by_category(category: str):
-    connection = await get_connection()
-    cursor = await connection.cursor()
-
+async def get_products_by_category(category: str, products: ProductRepository = Depends(get_products_read)):
     try:
-        today = datetime.now().strftime('%Y-%m-%d')
-        await cursor.execute("SELECT * FROM products WHERE productCategory = %s AND productExpiry >= %s", (category, today))
-        products = await cursor.fetchall()
+        category_products = await products.active_by_category(category)
 
-        if not products:
+        if not category_products:
             raise HTTPException(status_code=404, detail="No products found for the category")
 
-        return [dict_to_product(product) for product in products]
+        return TrustedJSONResponse(category_products)
 
     except aiomysql.Error as err:
         print(f"Error retrieving products by category: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
-
 
 @router.get("/categories", response_model=List[str], tags=["Category"])
-async def get_categories():
-    connection = await get_connection()
-    cursor = await connection.cursor()
-
+async def get_categories(request: Request, products: ProductRepository = Depends(get_products_read)):
     try:
-        await cursor.execute("SELECT DISTINCT productCategory FROM products")
-        categories = await cursor.fetchall()
-
-        if not categories:
-            return []
+        unchanged, headers = not_modified(request, products_version)
+        if unchanged:
+            return unchanged
 
-        return [category[0] for category in categories if category and category[0]]
+        categories = await products.categories()
+        return TrustedJSONResponse(categories, headers=_response_headers(products, headers))
 
     except aiomysql.Error as err:
         print(f"Error retrieving categories: {err}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-    finally:
-        await close_connection(connection)
-
-
 
+@router.get("/cache/stats", response_model=dict, tags=["Cache"])
+async def get_cache_stats():
+    return catalog_cache.stats()
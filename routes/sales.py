@@ -1,75 +1,152 @@
-import aiomysql
-from fastapi import APIRouter, HTTPException, Body, Depends
-from typing import List
-from database.database import get_connection
-from models.sales import Sales
+import csv
+import io
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from database.database import STICKY_COOKIE, acquire_read_connection, release_connection
+from models.page import Page
+from models.sales import SaleLine, Sales, SalesBatch, SalesBatchResult
+from repositories.base import provide, provide_read
+from repositories.sales import SALES_COLUMNS, SalesRepository, StockConflict
+from services.pagination import page_params
+from services.serialization import TrustedJSONResponse, dumps
+from services.write_behind import QueueFull, sales_write_behind
 
 router = APIRouter()
 
+get_sales_repository = provide(SalesRepository)
+get_sales_read = provide_read(SalesRepository)
+
+# Rows pulled from the server-side cursor per round trip while exporting
+EXPORT_BATCH_SIZE = 500
+
+
+# With write-behind on, stock is reserved now and the sales rows are written by the queue
+async def _checkout(sales: SalesRepository, customer_id: int, sales_date: datetime, items: List[SaleLine]):
+    if sales_write_behind.running:
+        return await sales_write_behind.submit(sales, customer_id, sales_date, items)
+    return await sales.checkout(customer_id, sales_date, items)
+
+
 @router.post("/sales/", response_model=Sales, tags=["Sales"])
-async def create_sale(sale: Sales, conn=Depends(get_connection)):
-    async with conn.cursor() as cursor:
-        try:
-            # Insert the sale record
-            await cursor.execute(
-                "INSERT INTO sales (sellerId, customerId, quantity, salesDate, price, productId) VALUES (%s, %s, %s, %s, %s, %s)",
-                (sale.sellerId, sale.customerId, sale.quantity, sale.salesDate, sale.price, sale.productId)
-            )
-            await conn.commit()
-
-            # Update the product quantity
-            await cursor.execute(
-                "UPDATE products SET productQuantity = productQuantity - %s WHERE productId = %s",
-                (sale.quantity, sale.productId)
-            )
-            await conn.commit()
-
-            return sale
-        except Exception as e:
-            await conn.rollback()
-            raise HTTPException(status_code=500, detail=f"Error creating sale: {e}")
-        
-
-@router.get("/sales/", response_model=List[Sales], tags=["Sales"])
-async def get_all_sales(conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM sales")
-            return await cursor.fetchall()
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
+async def create_sale(sale: Sales, sales: SalesRepository = Depends(get_sales_repository)):
+    if sale.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    line = SaleLine(productId=sale.productId, sellerId=sale.sellerId, quantity=sale.quantity, price=sale.price)
+    try:
+        results, committed = await _checkout(sales, sale.customerId, sale.salesDate, [line])
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except StockConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating sale: {e}")
+
+    if not committed:
+        raise HTTPException(status_code=409, detail=f"Product {sale.productId}: {results[0].status}")
+    return sale
+
+
+@router.post("/sales/batch", response_model=SalesBatchResult, tags=["Sales"])
+async def create_sales_batch(batch: SalesBatch, sales: SalesRepository = Depends(get_sales_repository)):
+    sales_date = batch.salesDate or datetime.now()
+    try:
+        results, committed = await _checkout(sales, batch.customerId, sales_date, batch.items)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except StockConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating sales: {e}")
+
+    result = SalesBatchResult(customerId=batch.customerId, salesDate=sales_date, items=results)
+    if not committed:
+        raise HTTPException(status_code=409, detail=result.model_dump(mode="json"))
+    return result
+
+
+@router.get("/sales/", response_model=Page, tags=["Sales"])
+async def get_all_sales(page: dict = Depends(page_params), sales: SalesRepository = Depends(get_sales_read)):
+    try:
+        return TrustedJSONResponse(await sales.page(page))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
+
+
+# Stream an export on a connection owned by the generator, so it stays checked
+# out for exactly as long as the response body is being sent
+async def _stream_sales(sql: str, params: tuple, fmt: str, sticky: bool):
+    connection = await acquire_read_connection(sticky)
+    finished = False
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=SALES_COLUMNS, lineterminator="\n")
+            writer.writeheader()
+            yield buffer.getvalue()
+        async for rows in SalesRepository(connection).iter_export(sql, params, EXPORT_BATCH_SIZE):
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield b"".join(dumps(row) + b"\n" for row in rows)
+        finished = True
+    finally:
+        # An abandoned unbuffered result cannot be reused; drop the connection
+        # and let the pool replace it
+        if not finished:
+            connection.close()
+        await release_connection(connection)
+
+
+@router.get("/sales/export", tags=["Sales"])
+async def export_sales(
+    request: Request,
+    seller_id: Optional[int] = Query(None, alias="sellerId"),
+    customer_id: Optional[int] = Query(None, alias="customerId"),
+    start: Optional[datetime] = Query(None, description="Include sales on or after this time"),
+    end: Optional[datetime] = Query(None, description="Include sales before this time"),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+):
+    sql, params = SalesRepository.export_query(seller_id, customer_id, start, end)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_sales(sql, params, format, STICKY_COOKIE in request.cookies),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=sales.{format}"},
+    )
 
 
 @router.get("/sales/{sales_id}", response_model=Sales, tags=["Sales"])
-async def get_sales(sales_id: int, conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM sales WHERE SalesNumber = %s", (sales_id,))
-            sales = await cursor.fetchone()
-            if not sales:
-                raise HTTPException(status_code=404, detail="Sales not found")
-            return sales
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
+async def get_sales(sales_id: int, sales: SalesRepository = Depends(get_sales_read)):
+    try:
+        sale = await sales.get(sales_id)
+        if not sale:
+            raise HTTPException(status_code=404, detail="Sales not found")
+        return TrustedJSONResponse(sale)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
 
 
 @router.get("/sales/seller/{seller_id}", response_model=List[Sales], tags=["Sales"])
-async def get_sales_by_seller(seller_id: int, conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM sales WHERE sellerId = %s", (seller_id,))
-            sales = await cursor.fetchall()
-            return sales
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
+async def get_sales_by_seller(seller_id: int, sales: SalesRepository = Depends(get_sales_read)):
+    try:
+        return TrustedJSONResponse(await sales.by_seller(seller_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
 
 
 @router.get("/sales/customer/{customer_id}", response_model=List[Sales], tags=["Sales"])
-async def get_sales_by_customer(customer_id: int, conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM sales WHERE customerId = %s", (customer_id,))
-            sales = await cursor.fetchall()
-            return sales
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
\ No newline at end of file
+async def get_sales_by_customer(customer_id: int, sales: SalesRepository = Depends(get_sales_read)):
+    try:
+        return TrustedJSONResponse(await sales.by_customer(customer_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving sales: {e}")
@@ -1,23 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 import aiomysql
-import bcrypt
 
-from database.database import get_connection
+from models.page import Page
 from models.seller import Seller
+from repositories.base import provide
+from repositories.sellers import SellerRepository
+from services.password import hash_password
+from services.pagination import page_params
+from services.serialization import RowSerializer, TrustedJSONResponse
 
 router = APIRouter()
 
-# Function to hash the password
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
-
-
-# Function to verify the password
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
-
+get_sellers = provide(SellerRepository)
+seller_rows = RowSerializer(Seller)
 
 # Function to remove password from customer data
 def remove_password(seller_data: dict) -> dict:
@@ -26,73 +21,52 @@ def remove_password(seller_data: dict) -> dict:
     return seller_data
 
 @router.post("/sellers/create", response_model=Seller, tags=["Seller"])
-async def create_seller(seller: Seller, conn=Depends(get_connection)):
-    hashed_password = hash_password(seller.sellerPassword)
-    async with conn.cursor() as cursor:
-        try:
-            sql = """
-                INSERT INTO seller (sellerId, sellerName, sellerEmail, sellerPassword)
-                VALUES (%s, %s, %s, %s)
-            """
-            await cursor.execute(sql, (seller.sellerId, seller.sellerName, seller.sellerEmail, hashed_password))
-            await conn.commit()
-            return seller 
-        except aiomysql.Error as err:
-            raise HTTPException(status_code=500, detail="Error creating seller")
+async def create_seller(seller: Seller, sellers: SellerRepository = Depends(get_sellers)):
+    hashed_password = await hash_password(seller.sellerPassword)
+    try:
+        await sellers.create(seller, hashed_password)
+        return seller
+    except aiomysql.Error as err:
+        raise HTTPException(status_code=500, detail="Error creating seller")
 
 
-@router.get("/sellers/", response_model=list[Seller], tags=["Seller"])
-async def get_seller_list(conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM seller")
-            sellers = await cursor.fetchall()
-            return [Seller(**seller) for seller in sellers]
-        except aiomysql.Error as err:
-            raise HTTPException(status_code=500, detail="Error retrieving sellers")
+@router.get("/sellers/", response_model=Page, tags=["Seller"])
+async def get_seller_list(page: dict = Depends(page_params), sellers: SellerRepository = Depends(get_sellers)):
+    try:
+        return TrustedJSONResponse(await sellers.page(page))
+    except aiomysql.Error as err:
+        raise HTTPException(status_code=500, detail="Error retrieving sellers")
 
 
 @router.get("/sellers/{seller_id}", response_model=Seller, tags=["Seller"])
-async def get_seller(seller_id: int, conn=Depends(get_connection)):
-    async with conn.cursor(aiomysql.DictCursor) as cursor:
-        try:
-            await cursor.execute("SELECT * FROM seller WHERE sellerId = %s", (seller_id,))
-            seller = await cursor.fetchone()
-            if not seller:
-                raise HTTPException(status_code=404, detail="Seller not found")
-            return Seller(**seller)
-        except aiomysql.Error as err:
-            raise HTTPException(status_code=500, detail="Error retrieving seller")
+async def get_seller(seller_id: int, sellers: SellerRepository = Depends(get_sellers)):
+    try:
+        seller = await sellers.get(seller_id)
+        if not seller:
+            raise HTTPException(status_code=404, detail="Seller not found")
+        return TrustedJSONResponse(seller_rows.row(seller))
+    except aiomysql.Error as err:
+        raise HTTPException(status_code=500, detail="Error retrieving seller")
 
 
 # Update a seller (implement similar logic as update_customer)
 @router.put("/sellers/{seller_id}", response_model=Seller, tags=["Seller"])
-async def update_seller(seller_id: int, seller: Seller, conn=Depends(get_connection)):
-    hashed_password = hash_password(seller.customerPassword)
-    async with conn.cursor() as cursor:
-        try:
-            sql = """
-                UPDATE customer SET sellerName = %s, sellerEmail = %s, sellerPassword = %s
-                WHERE sellerId = %s
-            """
-            await cursor.execute(sql, (seller.customerName, seller.customerEmail, hashed_password, seller_id))
-            if cursor.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Seller not found")
-            await conn.commit()
-            return seller
-        except aiomysql.Error as err:
-            raise HTTPException(status_code=500, detail="Error updating seller")
+async def update_seller(seller_id: int, seller: Seller, sellers: SellerRepository = Depends(get_sellers)):
+    hashed_password = await hash_password(seller.sellerPassword)
+    try:
+        if not await sellers.update(seller_id, seller, hashed_password):
+            raise HTTPException(status_code=404, detail="Seller not found")
+        return seller
+    except aiomysql.Error as err:
+        raise HTTPException(status_code=500, detail="Error updating seller")
 
 
 # Delete a seller (implement similar logic as delete_customer)
 @router.delete("/sellers/{seller_id}", tags=["Seller"])
-async def delete_seller(seller_id: int, conn=Depends(get_connection)):
-        async with conn.cursor() as cursor:
-            try:
-                await cursor.execute("DELETE FROM seller WHERE sellerId = %s", (seller_id,))
-                if cursor.rowcount == 0:
-                    raise HTTPException(status_code=404, detail="Seller not found")
-                await conn.commit()
-                return {"message": "Seller deleted successfully"}
-            except aiomysql.Error as err:
-                raise HTTPException(status_code=500, detail="Error deleting seller")
\ No newline at end of file
+async def delete_seller(seller_id: int, sellers: SellerRepository = Depends(get_sellers)):
+    try:
+        if not await sellers.delete(seller_id):
+            raise HTTPException(status_code=404, detail="Seller not found")
+        return {"message": "Seller deleted successfully"}
+    except aiomysql.Error as err:
+        raise HTTPException(status_code=500, detail="Error deleting seller")
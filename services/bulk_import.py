@@ -0,0 +1,172 @@
+"""Streaming parsers and chunked validation for bulk product imports.
+
+Request bodies are consumed chunk by chunk from ``request.stream()``: a JSON
+array is decoded one element at a time with ``raw_decode`` and a CSV file
+one complete record at a time, so a large upload is never held as a single
+string or parsed list. Rows are validated against ``ProductImport`` in
+chunks of ``BULK_CHUNK_SIZE``.
+"""
+import codecs
+import csv
+import json
+import os
+
+from pydantic import ValidationError
+
+from models.product import BulkRowStatus, ProductImport
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "50000"))
+
+
+class BulkParseError(ValueError):
+    """The upload is not a JSON array of objects or a CSV file with a header."""
+
+
+_WHITESPACE = " \t\r\n"
+
+
+# Yield each element of a top-level JSON array as it arrives
+async def iter_json_items(stream):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    position = 0
+    started = False
+    finished = False
+    expect_item = True
+    seen_item = False
+
+    async for chunk in _with_end(stream):
+        final = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(chunk or b"", final=final)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            if finished:
+                raise BulkParseError("Unexpected data after the JSON array")
+            char = buffer[position]
+            if not started:
+                if char != "[":
+                    raise BulkParseError("Expected a JSON array")
+                started = True
+                position += 1
+            elif char == "]":
+                if expect_item and seen_item:
+                    raise BulkParseError("Trailing ',' in the JSON array")
+                finished = True
+                position += 1
+            elif char == ",":
+                if expect_item:
+                    raise BulkParseError("Unexpected ',' in the JSON array")
+                expect_item = True
+                position += 1
+            else:
+                if not expect_item:
+                    raise BulkParseError("Expected ',' between JSON array items")
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as err:
+                    if final:
+                        raise BulkParseError(f"Invalid JSON: {err}")
+                    # an element split across chunks; wait for more input
+                    break
+                if end == len(buffer) and not final:
+                    # a scalar such as 12 may continue in the next chunk
+                    break
+                position = end
+                expect_item = False
+                seen_item = True
+                yield item
+        if final and not finished:
+            raise BulkParseError("Unterminated JSON array")
+
+
+# Yield one dict per CSV record, keyed by the header row
+async def iter_csv_rows(stream):
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    header = None
+
+    async for chunk in _with_end(stream):
+        final = chunk is None
+        pending += text_decoder.decode(chunk or b"", final=final)
+        if final:
+            complete, pending = pending, ""
+        else:
+            complete, pending = _split_complete_records(pending)
+        if not complete:
+            continue
+        for values in csv.reader(complete.splitlines(keepends=True)):
+            if not values:
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield {"__error__": f"expected {len(header)} columns, got {len(values)}"}
+                continue
+            yield dict(zip(header, values))
+    if header is None:
+        raise BulkParseError("CSV upload has no header row")
+
+
+# Cut text after the last newline that is outside a quoted field
+def _split_complete_records(text: str):
+    inside_quotes = False
+    boundary = 0
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        offset += len(line)
+        if line.count('"') % 2:
+            inside_quotes = not inside_quotes
+        if not inside_quotes and line.endswith(("\n", "\r")):
+            boundary = offset
+    return text[:boundary], text[boundary:]
+
+
+async def _with_end(stream):
+    async for chunk in stream:
+        if chunk:
+            yield chunk
+    yield None
+
+
+# Group parsed rows into numbered chunks: yields [(row_number, raw_row), ...]
+async def iter_chunks(rows, size: int = BULK_CHUNK_SIZE, max_rows: int = BULK_MAX_ROWS):
+    chunk = []
+    number = 0
+    async for row in rows:
+        number += 1
+        if number > max_rows:
+            raise BulkParseError(f"Uploads are limited to {max_rows} rows")
+        chunk.append((number, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Validate one chunk; returns ([(row_number, ProductImport)], [invalid BulkRowStatus])
+def validate_chunk(chunk: list):
+    valid = []
+    invalid = []
+    for number, raw in chunk:
+        if not isinstance(raw, dict):
+            invalid.append(BulkRowStatus(row=number, status="invalid", errors=["row must be an object"]))
+            continue
+        if "__error__" in raw:
+            invalid.append(BulkRowStatus(row=number, status="invalid", errors=[raw["__error__"]]))
+            continue
+        # empty CSV cells mean "not given", so optional columns fall back to their defaults
+        values = {key: value for key, value in raw.items() if value != ""}
+        try:
+            valid.append((number, ProductImport.model_validate(values)))
+        except ValidationError as err:
+            errors = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in err.errors()]
+            invalid.append(BulkRowStatus(row=number, status="invalid", errors=errors))
+    return valid, invalid
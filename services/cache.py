@@ -0,0 +1,162 @@
+import os
+import time
+from collections import OrderedDict, defaultdict
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+CATALOG_CACHE_MAXSIZE = int(os.getenv("CATALOG_CACHE_MAXSIZE", "1024"))
+
+# Returned by TTLCache.get when a key is absent or expired
+MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    Entries can carry tags so that a write can drop every entry that
+    depends on a row without knowing the exact keys.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._tags = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, tags=()):
+        if key in self._data:
+            self._remove(key)
+        tags = frozenset(tags)
+        self._data[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._tags[tag].add(key)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        if key in self._data:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_tags(self, *tags):
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self.invalidate(key)
+
+    def clear(self):
+        self._data.clear()
+        self._tags.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+catalog_cache = TTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+
+class TableVersion:
+    """Change counter for a table, bumped by every write this process makes.
+
+    Other workers' writes are not seen, so like the catalog cache the
+    validators roll over every ``ttl`` seconds; a client can therefore be
+    told "not modified" for at most that long after another worker's write.
+    """
+
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.version = 0
+        # 0 until this process writes, so nothing looks recently changed at boot
+        self.modified = 0
+        self._started = int(time.time())
+        self._boot = format(int(time.time() * 1000), "x")
+
+    def bump(self):
+        self.version += 1
+        self.modified = int(time.time())
+
+    def _epoch(self) -> int:
+        return int(time.time() // self.ttl) if self.ttl > 0 else 0
+
+    def etag(self) -> str:
+        return f'W/"{self.name}-{self._boot}-{self.version}-{self._epoch()}"'
+
+    # Unix seconds of the last change, never older than process start or the current ttl window
+    def last_modified(self) -> int:
+        return max(self.modified, self._started, int(self._epoch() * self.ttl))
+
+
+products_version = TableVersion("products", CATALOG_CACHE_TTL)
+
+
+# Tags attached to a cached product listing: its query shape plus every product in it
+def listing_tags(shape, product_ids):
+    return [shape, *(("product", product_id) for product_id in product_ids)]
+
+
+# A new product can appear in the full listing, its category, its seller and the category list
+def invalidate_new_product(product):
+    products_version.bump()
+    catalog_cache.invalidate_tags(
+        ("all",),
+        ("category", product.productCategory),
+        ("seller", product.sellerId),
+        ("categories",),
+    )
+
+
+# An edited product drops every listing it was in plus those it may now join
+def invalidate_changed_product(product_id, product):
+    catalog_cache.invalidate_tags(("product", product_id))
+    invalidate_new_product(product)
+
+
+# A deleted product only affects listings that contained it and the category list
+def invalidate_deleted_product(product_id):
+    products_version.bump()
+    catalog_cache.invalidate_tags(("product", product_id), ("categories",))
+
+
+# A stock change only affects listings that contain the product
+def invalidate_product_stock(product_id):
+    products_version.bump()
+    catalog_cache.invalidate_tags(("product", product_id))
@@ -0,0 +1,87 @@
+"""Conditional GET support for the catalog endpoints.
+
+Validators come from a ``TableVersion`` rather than from the payload, so a
+handler can answer ``If-None-Match`` / ``If-Modified-Since`` with a 304
+before it runs any query. The version is read before the query: a write
+that lands while the query runs only makes the next request refetch.
+
+A single product is the exception: its ETag is the strong ``row_etag`` built
+from its rowVersion, which PUT and PATCH accept back as ``If-Match``.
+"""
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from services.cache import TableVersion
+
+CATALOG_CACHE_CONTROL = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=10, must-revalidate")
+
+_ROW_ETAG = re.compile(r'"p(\d+)-v(\d+)"')
+
+
+def row_etag(product_id: int, row_version: int) -> str:
+    return f'"p{product_id}-v{row_version}"'
+
+
+# (productId, rowVersion) from a row_etag value, or None for anything else
+def parse_row_etag(value: str):
+    match = _ROW_ETAG.fullmatch(value.strip())
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # weak comparison: W/ prefixes are ignored on both sides
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: int) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since.timestamp()
+
+
+# ETag, Last-Modified and Cache-Control for a response built from `table`
+def validators(table: TableVersion, etag: Optional[str] = None) -> dict:
+    modified = datetime.fromtimestamp(table.last_modified(), tz=timezone.utc)
+    return {
+        "ETag": etag or table.etag(),
+        "Last-Modified": format_datetime(modified, usegmt=True),
+        "Cache-Control": CATALOG_CACHE_CONTROL,
+    }
+
+
+# Returns (304 response or None, headers for the full response); `etag`
+# replaces the table's own, e.g. with a row_etag
+def not_modified(request: Request, table: TableVersion, etag: Optional[str] = None):
+    etag = etag or table.etag()
+    headers = validators(table, etag)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence; If-Modified-Since is then ignored
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = if_modified_since is not None and _not_modified_since(if_modified_since, table.last_modified())
+
+    if fresh:
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
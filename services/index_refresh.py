@@ -0,0 +1,56 @@
+"""Periodic reload of the in-process product indexes.
+
+Each worker keeps its own indexes current with the writes it makes, but
+never sees another worker's. Every ``INDEX_REFRESH_INTERVAL`` seconds
+(``CATALOG_CACHE_TTL`` unless set, the bound the catalog cache already gives
+for other workers' writes) it reads a cheap fingerprint of the products
+table and reloads the indexes only when that changed. The inventory index
+is reconciled rather than replaced, so stock subscribers see the changes.
+"""
+import asyncio
+import os
+
+from database.database import acquire_connection, release_connection
+from repositories.products import ProductRepository
+from services.cache import CATALOG_CACHE_TTL, products_version
+from services.inventory import inventory_index
+from services.search import product_index
+
+INDEX_REFRESH_INTERVAL = float(os.getenv("INDEX_REFRESH_INTERVAL", str(CATALOG_CACHE_TTL)))
+
+
+# Reload the warmed indexes if the products table changed since `fingerprint`;
+# returns the fingerprint they now reflect
+async def refresh_indexes(fingerprint=None):
+    connection = await acquire_connection()
+    try:
+        products = ProductRepository(connection)
+        current = await products.fingerprint()
+        if current == fingerprint:
+            return fingerprint
+        version = products_version.version
+        rows = await products.fetchall_products() if product_index.ready else None
+        stock = await products.fetchall_stock_levels() if inventory_index.ready else None
+    finally:
+        await release_connection(connection)
+    # a write this process made while the rows were read is missing from them
+    # but already in the index; keep the index and try again next time
+    if products_version.version != version:
+        return fingerprint
+    if rows is not None:
+        product_index.load(rows)
+    if stock is not None:
+        inventory_index.sync(stock)
+    return current
+
+
+async def run_index_refresh():
+    fingerprint = None
+    while True:
+        await asyncio.sleep(INDEX_REFRESH_INTERVAL)
+        try:
+            fingerprint = await refresh_indexes(fingerprint)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            print(f"Error refreshing product indexes: {err}")
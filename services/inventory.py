@@ -0,0 +1,180 @@
+"""In-process per-seller stock levels with change notifications.
+
+For every seller the index keeps each product's stock fields and a list of
+``(productQuantity, productId)`` pairs sorted by quantity, so "below N" and
+"sold out" are a bisect and a slice, O(log n + result). It is warmed at
+startup and kept current by the product repository and checkout, so
+inventory reads never touch MySQL. Only unexpired products are indexed;
+other workers' writes and products expiring overnight are picked up by
+``services.index_refresh``, which reconciles the index with ``sync``.
+
+Every change to a product's quantity, sold count, name or seller is published
+to that seller's subscribers (the server-sent events stream under
+/inventory). Each subscriber has a queue of ``INVENTORY_QUEUE_SIZE`` events;
+one that falls that far behind is dropped, its stream ends and the client
+reconnects to a fresh snapshot.
+"""
+import asyncio
+import os
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date
+
+INVENTORY_INDEX_ENABLED = os.getenv("INVENTORY_INDEX_ENABLED", "1") == "1"
+INVENTORY_QUEUE_SIZE = int(os.getenv("INVENTORY_QUEUE_SIZE", "256"))
+
+STOCK_FIELDS = ("productId", "productName", "productQuantity", "sold", "sellerId", "rowVersion")
+
+# A change to any of these is pushed to subscribers; price or expiry edits are not
+_WATCHED_FIELDS = ("productName", "productQuantity", "sold", "sellerId")
+
+
+def _entry(row: dict) -> dict:
+    return {field: row.get(field) for field in STOCK_FIELDS}
+
+
+class Subscription:
+
+    def __init__(self, seller_id: int, maxsize: int):
+        self.seller_id = seller_id
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+
+class InventoryIndex:
+
+    def __init__(self, queue_size: int = INVENTORY_QUEUE_SIZE):
+        self.ready = False
+        self.queue_size = queue_size
+        self._products = {}
+        self._levels = defaultdict(list)
+        self._subscribers = defaultdict(set)
+
+    def load(self, rows):
+        self._products.clear()
+        self._levels.clear()
+        for row in rows:
+            entry = _entry(row)
+            self._products[entry["productId"]] = entry
+            self._levels[entry["sellerId"]].append((entry["productQuantity"], entry["productId"]))
+        for levels in self._levels.values():
+            levels.sort()
+        self.ready = True
+
+    # Bring the index in line with a fresh read of every product, publishing
+    # the differences like any other change
+    def sync(self, rows):
+        current = set()
+        for row in rows:
+            current.add(row["productId"])
+            entry = self._products.get(row["productId"])
+            if entry is None or any(entry[field] != row.get(field) for field in STOCK_FIELDS):
+                self.upsert(row)
+        for product_id in [product_id for product_id in self._products if product_id not in current]:
+            self.remove(product_id)
+
+    def get(self, product_id: int):
+        return self._products.get(product_id)
+
+    def size(self) -> int:
+        return len(self._products)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    # Every product of a seller, lowest stock first
+    def by_seller(self, seller_id: int) -> list:
+        return [self._products[product_id] for _, product_id in self._levels.get(seller_id, ())]
+
+    # Products of a seller with fewer than `threshold` units, lowest stock first
+    def below(self, seller_id: int, threshold: int) -> list:
+        levels = self._levels.get(seller_id, ())
+        end = bisect_left(levels, (threshold,))
+        return [self._products[product_id] for _, product_id in levels[:end]]
+
+    def sold_out(self, seller_id: int) -> list:
+        return self.below(seller_id, 1)
+
+    # Replace a product's stock fields; keep_sold keeps the indexed sold count
+    # for writes that do not touch the column (bulk import updates)
+    def upsert(self, row: dict, keep_sold: bool = False):
+        expiry = row.get("productExpiry")
+        if expiry is not None and str(expiry) <= date.today().isoformat():
+            # saved already expired: not shown anywhere else, so not here either
+            self.remove(row["productId"])
+            return
+        entry = _entry(row)
+        current = self._products.get(entry["productId"])
+        if current is not None:
+            if keep_sold:
+                entry["sold"] = current["sold"]
+            self._unlink(current)
+            if current["sellerId"] != entry["sellerId"]:
+                self._publish(current["sellerId"], "removed", current)
+        self._link(entry)
+        if current is None or any(current[field] != entry[field] for field in _WATCHED_FIELDS):
+            self._publish(entry["sellerId"], "stock", entry)
+
+    def remove(self, product_id: int):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        self._unlink(entry)
+        self._publish(entry["sellerId"], "removed", entry)
+
+    def add_sold(self, product_id: int, quantity: int):
+        current = self._products.get(product_id)
+        if current is None:
+            return
+        self._unlink(current)
+        entry = dict(
+            current,
+            productQuantity=current["productQuantity"] - quantity,
+            sold=current["sold"] + quantity,
+            rowVersion=(current["rowVersion"] or 0) + 1,
+        )
+        self._link(entry)
+        self._publish(entry["sellerId"], "stock", entry)
+
+    def subscribe(self, seller_id: int) -> Subscription:
+        subscription = Subscription(seller_id, self.queue_size)
+        self._subscribers[seller_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.seller_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.seller_id]
+
+    # Entries are replaced rather than mutated, so rows handed out stay consistent
+    def _link(self, entry: dict):
+        self._products[entry["productId"]] = entry
+        insort(self._levels[entry["sellerId"]], (entry["productQuantity"], entry["productId"]))
+
+    def _unlink(self, entry: dict):
+        levels = self._levels.get(entry["sellerId"])
+        if levels is None:
+            return
+        key = (entry["productQuantity"], entry["productId"])
+        index = bisect_left(levels, key)
+        if index < len(levels) and levels[index] == key:
+            del levels[index]
+        if not levels:
+            del self._levels[entry["sellerId"]]
+
+    def _publish(self, seller_id: int, event: str, entry: dict):
+        for subscription in list(self._subscribers.get(seller_id, ())):
+            try:
+                subscription.queue.put_nowait((event, entry))
+            except asyncio.QueueFull:
+                # too far behind: drop its backlog and end the stream with None
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+
+inventory_index = InventoryIndex()
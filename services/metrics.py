@@ -0,0 +1,132 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Metrics are plain counters and fixed-bucket histograms keyed by label
+values; recording one is a dict lookup, a bisect and two additions, cheap
+enough to leave on for every request and query.
+"""
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Gauge:
+    """A value read at scrape time from ``collect()``, which returns {labels: value}."""
+
+    def __init__(self, name: str, documentation: str, collect, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.collect().items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+_registry = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'[^']*'|\b\d+\b")
+
+
+# Collapse a statement to a stable label: whitespace folded, IN lists and literals
+# replaced, so one query shape is one time series
+@lru_cache(maxsize=512)
+def normalize_sql(sql: str) -> str:
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _LITERAL.sub("?", sql)
+    return sql[:200]
+
+
+http_request_duration = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"),
+))
+db_query_duration = register(Histogram(
+    "db_query_duration_seconds", "Database statement latency by normalized SQL", ("query",),
+))
+db_query_rows = register(Counter(
+    "db_query_rows_total", "Rows returned or affected by normalized SQL", ("query",),
+))
+db_pool_wait = register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to acquire a pooled connection",
+))
+singleflight_requests = register(Counter(
+    "singleflight_requests_total", "Reads that ran a query (leader) or shared one already in flight (coalesced)", ("group", "role"),
+))
@@ -0,0 +1,78 @@
+import base64
+import json
+import os
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query
+
+from models.page import Page
+
+DEFAULT_PAGE_LIMIT = int(os.getenv("DEFAULT_PAGE_LIMIT", "100"))
+MAX_PAGE_LIMIT = int(os.getenv("MAX_PAGE_LIMIT", "1000"))
+
+
+# Query parameters shared by every paginated listing
+def page_params(
+    cursor: Optional[str] = Query(None, description="Opaque token returned as nextCursor by the previous page"),
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT, description="Maximum number of rows to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of columns to return"),
+):
+    return {"cursor": cursor, "limit": limit, "fields": fields}
+
+
+def encode_cursor(last_key: int) -> str:
+    raw = json.dumps({"k": last_key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[int]:
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["k"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Resolve ?fields= against the columns a table exposes; the key column is always selected
+def select_columns(fields: Optional[str], allowed: Sequence[str], key: str) -> list:
+    if not fields:
+        return list(allowed)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if key not in requested:
+        requested.insert(0, key)
+    return list(dict.fromkeys(requested))
+
+
+# Fetch one keyset page ordered by ``key`` through ``fetchall(sql, params)``;
+# ``where`` is an extra SQL predicate with ``params``
+async def fetch_page(fetchall, table: str, key: str, allowed: Sequence[str], page: dict, where: str = "", params=()) -> Page:
+    columns = select_columns(page["fields"], allowed, key)
+    after = decode_cursor(page["cursor"])
+    limit = page["limit"]
+
+    conditions = []
+    args = []
+    if where:
+        conditions.append(where)
+        args.extend(params)
+    if after is not None:
+        conditions.append(f"`{key}` > %s")
+        args.append(after)
+    sql = f"SELECT {', '.join(f'`{column}`' for column in columns)} FROM `{table}`"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY `{key}` LIMIT %s"
+    args.append(limit + 1)
+
+    rows = list(await fetchall(sql, tuple(args)))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][key])
+    # Rows come straight from the database, so skip re-validating them
+    return Page.model_construct(items=rows, nextCursor=next_cursor)
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+# bcrypt cost factor and the number of hashes allowed to run at once
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# bcrypt releases the GIL, so a small thread pool keeps the event loop free
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+
+def _hash(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+# Hash a password on the bcrypt pool
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _hash, password)
+
+
+# Check a password against its hash on the bcrypt pool
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _verify, plain_password, hashed_password)
+
+
+# Stop the bcrypt pool, called from the app lifespan on shutdown
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+_dummy_hash = None
+
+
+# Verify against ``hashed_password``, or against a throwaway hash of the same cost
+# when the account does not exist, so unknown emails take as long as wrong passwords
+async def verify_password_or_dummy(plain_password: str, hashed_password: Optional[str]) -> bool:
+    global _dummy_hash
+    if hashed_password is None:
+        if _dummy_hash is None:
+            _dummy_hash = await hash_password(secrets.token_urlsafe(16))
+        await verify_password(plain_password, _dummy_hash)
+        return False
+    return await verify_password(plain_password, hashed_password)
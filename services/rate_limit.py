@@ -0,0 +1,59 @@
+import math
+import os
+import time
+
+LOGIN_EMAIL_LIMIT = int(os.getenv("LOGIN_EMAIL_LIMIT", "5"))
+LOGIN_IP_LIMIT = int(os.getenv("LOGIN_IP_LIMIT", "30"))
+LOGIN_WINDOW_SECONDS = float(os.getenv("LOGIN_WINDOW_SECONDS", "60"))
+
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: allows ``limit`` hits per ``window`` seconds per key.
+
+    Each key keeps only the current and previous fixed-window counts; the
+    previous one is weighted by how much of it still overlaps the sliding
+    window, so memory is constant per key and a check is O(1).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._counters = {}
+        self._next_sweep = time.monotonic() + window
+
+    # Record a hit for ``key``; returns 0 if allowed, otherwise seconds until retry
+    def hit(self, key) -> float:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        current_start = now - now % self.window
+        start, previous, current = self._counters.get(key, (current_start, 0, 0))
+        if start != current_start:
+            previous = current if current_start - start == self.window else 0
+            current = 0
+        overlap = 1 - (now - current_start) / self.window
+        if previous * overlap + current >= self.limit:
+            self._counters[key] = (current_start, previous, current)
+            # once the previous window's weight has decayed enough a hit fits again
+            if previous == 0:
+                return current_start + self.window - now
+            wait = (previous * overlap + current - self.limit) / previous * self.window + 0.001
+            return max(min(wait, current_start + self.window - now), 0.001)
+        self._counters[key] = (current_start, previous, current + 1)
+        return 0
+
+    # Drop keys idle for two windows so a flood of distinct keys cannot grow memory forever
+    def _sweep(self, now: float):
+        horizon = now - 2 * self.window
+        self._counters = {key: value for key, value in self._counters.items() if value[0] > horizon}
+        self._next_sweep = now + self.window
+
+
+login_email_limiter = SlidingWindowLimiter(LOGIN_EMAIL_LIMIT, LOGIN_WINDOW_SECONDS)
+login_ip_limiter = SlidingWindowLimiter(LOGIN_IP_LIMIT, LOGIN_WINDOW_SECONDS)
+
+
+# Seconds to wait before another login attempt for this email/IP, 0 if allowed
+def check_login(role: str, email: str, ip: str) -> int:
+    wait = max(login_ip_limiter.hit(ip), login_email_limiter.hit((role, email.lower())))
+    return math.ceil(wait)
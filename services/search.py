@@ -0,0 +1,184 @@
+"""In-process inverted index over the product catalog.
+
+Every product row is kept in memory together with a token -> productId
+posting index over ``productName`` and ``productCategory`` and a sorted list
+of lower-cased names for prefix lookups. The product repository updates the
+index on create/update/delete and checkout updates ``sold``, so searches
+never touch MySQL once the index has been warmed at startup. Other workers'
+writes arrive through ``services.index_refresh`` within its interval.
+"""
+import os
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "1") == "1"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _prefix_range(sorted_values: list, prefix: str):
+    start = bisect_left(sorted_values, prefix)
+    end = start
+    while end < len(sorted_values) and sorted_values[end].startswith(prefix):
+        end += 1
+    return start, end
+
+
+class ProductSearchIndex:
+
+    def __init__(self):
+        self.ready = False
+        self._products = {}
+        self._postings = defaultdict(set)
+        self._tokens = []
+        self._names = []
+
+    def load(self, rows):
+        self._products.clear()
+        self._postings.clear()
+        self._tokens = []
+        self._names = []
+        for row in rows:
+            self._add(row)
+        self._tokens.sort()
+        self._names.sort()
+        self.ready = True
+
+    def upsert(self, row: dict):
+        if row["productId"] in self._products:
+            self.remove(row["productId"])
+        self._add(row, keep_sorted=True)
+
+    def remove(self, product_id: int):
+        row = self._products.pop(product_id, None)
+        if row is None:
+            return
+        for token in self._row_tokens(row):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(product_id)
+            if not postings:
+                del self._postings[token]
+                index = bisect_left(self._tokens, token)
+                if index < len(self._tokens) and self._tokens[index] == token:
+                    del self._tokens[index]
+        entry = (row["productName"].lower(), product_id)
+        index = bisect_left(self._names, entry)
+        if index < len(self._names) and self._names[index] == entry:
+            del self._names[index]
+
+    def get(self, product_id: int):
+        return self._products.get(product_id)
+
+    def add_sold(self, product_id: int, quantity: int):
+        row = self._products.get(product_id)
+        if row is not None:
+            row["sold"] += quantity
+            row["productQuantity"] -= quantity
+            row["rowVersion"] = (row.get("rowVersion") or 0) + 1
+
+    def search(self, q=None, prefix=None, category=None, min_price=None, max_price=None,
+               expires_after=None, expires_before=None, sort="relevance", limit=20, offset=0):
+        """Returns (total, page of rows, category facet counts).
+
+        ``q`` matches every token against names and categories, the last token
+        as a prefix; ``prefix`` matches the start of the product name. Facet
+        counts honour every filter except ``category`` itself.
+        """
+        candidates = None
+        scores = Counter()
+        if q:
+            candidates, scores = self._match_text(q)
+        if prefix:
+            matched = self._match_prefix(prefix)
+            candidates = matched if candidates is None else candidates & matched
+        rows = self._products.values() if candidates is None else (self._products[i] for i in candidates)
+
+        filtered = []
+        for row in rows:
+            price = row["productPrice"]
+            expiry = row["productExpiry"]
+            if min_price is not None and price < min_price:
+                continue
+            if max_price is not None and price > max_price:
+                continue
+            if expires_after is not None and expiry <= expires_after:
+                continue
+            if expires_before is not None and expiry > expires_before:
+                continue
+            filtered.append(row)
+
+        facets = Counter(row["productCategory"] for row in filtered)
+        if category is not None:
+            filtered = [row for row in filtered if row["productCategory"] == category]
+
+        if sort == "price_asc":
+            filtered.sort(key=lambda row: (row["productPrice"], row["productId"]))
+        elif sort == "price_desc":
+            filtered.sort(key=lambda row: (-row["productPrice"], row["productId"]))
+        elif sort == "sold":
+            filtered.sort(key=lambda row: (-row["sold"], row["productId"]))
+        else:
+            filtered.sort(key=lambda row: (-scores[row["productId"]], row["productId"]))
+
+        return len(filtered), filtered[offset:offset + limit], dict(facets)
+
+    def _match_text(self, q: str):
+        tokens = tokenize(q)
+        candidates = None
+        scores = Counter()
+        for position, token in enumerate(tokens):
+            if position == len(tokens) - 1:
+                start, end = _prefix_range(self._tokens, token)
+                matched = set().union(*(self._postings[t] for t in self._tokens[start:end]))
+            else:
+                matched = set(self._postings.get(token, ()))
+            # exact token hits rank above prefix-only hits
+            for product_id in self._postings.get(token, ()):
+                scores[product_id] += 2
+            for product_id in matched:
+                scores[product_id] += 1
+            candidates = matched if candidates is None else candidates & matched
+        return candidates or set(), scores
+
+    def _match_prefix(self, prefix: str) -> set:
+        prefix = prefix.lower()
+        start = bisect_left(self._names, (prefix, -1))
+        matched = set()
+        for name, product_id in self._names[start:]:
+            if not name.startswith(prefix):
+                break
+            matched.add(product_id)
+        return matched
+
+    @staticmethod
+    def _row_tokens(row: dict) -> set:
+        return set(tokenize(row["productName"])) | set(tokenize(row["productCategory"]))
+
+    def _add(self, row: dict, keep_sorted: bool = False):
+        row = dict(row)
+        row["productPrice"] = float(row["productPrice"])
+        product_id = row["productId"]
+        self._products[product_id] = row
+        for token in self._row_tokens(row):
+            postings = self._postings[token]
+            if not postings:
+                if keep_sorted:
+                    insort(self._tokens, token)
+                else:
+                    self._tokens.append(token)
+            postings.add(product_id)
+        entry = (row["productName"].lower(), product_id)
+        if keep_sorted:
+            insort(self._names, entry)
+        else:
+            self._names.append(entry)
+
+
+product_index = ProductSearchIndex()
@@ -0,0 +1,64 @@
+"""Serialization fast path for rows read from our own database.
+
+Rows coming back from MySQL already match the column types, so building a
+Pydantic model per row and then having FastAPI validate the response again
+through ``response_model`` is pure overhead on large listings. Handlers that
+return ``TrustedJSONResponse`` skip both steps: rows are projected to the
+model's public fields and rendered straight to JSON. ``response_model`` stays
+on the route so the OpenAPI schema is unchanged.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+# The app's default response class: validated content, rendered with orjson when available
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class TrustedJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class RowSerializer:
+    """Projects database rows onto the non-excluded fields of a model."""
+
+    def __init__(self, model):
+        self.fields = tuple(name for name, field in model.model_fields.items() if not field.exclude)
+
+    def row(self, row: dict) -> dict:
+        return {name: row[name] for name in self.fields if name in row}
+
+    def rows(self, rows: Iterable[dict]) -> list:
+        fields = self.fields
+        return [{name: row[name] for name in fields if name in row} for row in rows]
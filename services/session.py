@@ -0,0 +1,90 @@
+"""Stateless signed session tokens.
+
+A token is ``<payload>.<signature>``: the payload is base64url JSON with the
+account role, id and expiry, and the signature is an HMAC-SHA256 over it
+with ``SESSION_SECRET``. Verifying one is a single HMAC, so authenticated
+requests never touch bcrypt or the database.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+
+# Without a configured secret each process signs with its own random key, so
+# tokens only work on the worker that issued them and die with it
+if not SESSION_SECRET:
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        raise RuntimeError("SESSION_SECRET must be set when running more than one worker")
+    print("Warning: SESSION_SECRET is not set; sessions are only valid on this process until it restarts")
+    SESSION_SECRET = secrets.token_urlsafe(32)
+
+_key = SESSION_SECRET.encode("utf-8")
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_key, payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_token(role: str, account_id: int) -> str:
+    claims = {"role": role, "sub": account_id, "exp": int(time.time()) + SESSION_TTL}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+# Claims of a valid, unexpired token, otherwise None
+def verify_token(token: str) -> Optional[dict]:
+    payload, _, signature = token.partition(".")
+    if not signature:
+        return None
+    try:
+        # a token is all base64url; anything else cannot have been issued by us
+        if not hmac.compare_digest(signature.encode("ascii"), _sign(payload).encode("ascii")):
+            return None
+    except UnicodeEncodeError:
+        return None
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+
+def login_response(role: str, account_id: int, message: str) -> dict:
+    return {
+        "message": message,
+        "token": issue_token(role, account_id),
+        "tokenType": "bearer",
+        "expiresIn": SESSION_TTL,
+    }
+
+
+# Dependency factory: require a bearer token (for ``role`` if given) and return its claims
+def require_session(role: Optional[str] = None):
+    async def dependency(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)):
+        claims = verify_token(credentials.credentials) if credentials else None
+        if claims is None or (role is not None and claims.get("role") != role):
+            raise HTTPException(status_code=401, detail="Invalid or expired session", headers={"WWW-Authenticate": "Bearer"})
+        return claims
+
+    return dependency
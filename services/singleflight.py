@@ -0,0 +1,64 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+The first caller for a key (the leader) runs the query; callers arriving
+while it is in flight await the same future instead of sending their own
+copy to MySQL. The query still runs on the leader's connection inside its
+request. If the leader is cancelled (client went away) its followers retry,
+and one of them becomes the new leader; any other error is shared.
+"""
+import asyncio
+
+from services.metrics import singleflight_requests
+
+
+class SingleFlight:
+
+    def __init__(self, group: str):
+        self.group = group
+        self._calls = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    # Await fn() once per key across every concurrent caller
+    async def do(self, key, fn):
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            singleflight_requests.inc(self.group, "coalesced")
+            try:
+                # shielded so a cancelled follower does not cancel the shared future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the leader was cancelled; try again, possibly as the new leader
+
+        singleflight_requests.inc(self.group, "leader")
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # retrieved here so an exception nobody else awaited is not logged as lost
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    # Make later callers start a fresh query, e.g. after a write to the row being read
+    def forget(self, key):
+        self._calls.pop(key, None)
+
+
+# Product reads, keyed by the query shape and its parameters
+product_reads = SingleFlight("products")
@@ -0,0 +1,457 @@
+"""Write-behind ingestion for sales (``SALES_WRITE_BEHIND=1``).
+
+``submit`` appends the sale to a local spool file, then reserves stock
+through ``SalesRepository.checkout`` with a reservation id and queues it. The
+checkout transaction stores the id in ``sales_reservations`` next to the
+stock decrement. A background worker drains the queue in batches of up to
+``SALES_FLUSH_BATCH_SIZE`` sales or ``SALES_FLUSH_INTERVAL`` seconds and
+writes each batch with ``record_sales``, which only writes sales whose
+reservation exists and consumes it. A flush is therefore idempotent: a
+replayed batch writes nothing twice, and a spooled sale whose checkout never
+committed writes nothing at all.
+
+Each process owns one spool file, ``SALES_SPOOL_PATH`` with ``{slot}``
+replaced by the first slot number whose file it can lock, so workers never
+share a spool. The spool is append-only JSON lines: ``{"seq": n, ...}`` per
+submission, and ``{"flushed": n, "done": [...]}`` after a flush, where ``n``
+is the highest seq below which every submission is settled (written,
+dead-lettered or rolled back) and ``done`` lists the settled ones above it.
+The file is truncated once every submission in it is settled; under steady
+load, when it outgrows ``SALES_SPOOL_COMPACT_BYTES`` (and twice its size
+after the last compaction) it is rewritten with only the unsettled
+submissions and renamed over the old one. At startup the process replays its
+own spool and any other spool no live process holds.
+
+With ``SALES_SPOOL_FSYNC=1`` a submission waits until its line is on disk.
+The fsync runs in the default executor and is shared: every line written
+while one is in flight is covered by the next, so concurrent submissions
+cost one fsync per group, not one each.
+
+A batch that fails with an error retrying cannot fix (bad data, constraint
+violations) is split and each submission that still fails after
+``SALES_FLUSH_MAX_ATTEMPTS`` is appended to the ``SALES_DEAD_LETTER_PATH``
+file with its error, so one bad sale cannot block the queue; its
+reservation row stays behind for manual repair. Connection errors are
+retried until they clear. At most ``SALES_QUEUE_MAXSIZE`` submissions wait
+in the queue; beyond that ``submit`` waits up to ``SALES_QUEUE_PUT_TIMEOUT``
+seconds and then raises ``QueueFull`` before touching stock.
+"""
+import asyncio
+import glob
+import json
+import os
+import uuid
+from datetime import datetime
+
+import aiomysql
+
+from database.database import acquire_connection, release_connection
+from models.sales import SaleLine
+from repositories.sales import SalesRepository
+from services.serialization import dumps
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks: fall back to one spool per pid
+    fcntl = None
+
+SALES_WRITE_BEHIND = os.getenv("SALES_WRITE_BEHIND", "0") == "1"
+SALES_QUEUE_MAXSIZE = int(os.getenv("SALES_QUEUE_MAXSIZE", "10000"))
+SALES_QUEUE_PUT_TIMEOUT = float(os.getenv("SALES_QUEUE_PUT_TIMEOUT", "1"))
+SALES_FLUSH_BATCH_SIZE = int(os.getenv("SALES_FLUSH_BATCH_SIZE", "500"))
+SALES_FLUSH_INTERVAL = float(os.getenv("SALES_FLUSH_INTERVAL", "0.05"))
+SALES_FLUSH_MAX_ATTEMPTS = int(os.getenv("SALES_FLUSH_MAX_ATTEMPTS", "5"))
+SALES_SPOOL_PATH = os.getenv("SALES_SPOOL_PATH", "sales_spool.{slot}.jsonl")
+SALES_DEAD_LETTER_PATH = os.getenv("SALES_DEAD_LETTER_PATH", "sales_dead_letter.{slot}.jsonl")
+SALES_SPOOL_FSYNC = os.getenv("SALES_SPOOL_FSYNC", "1") == "1"
+SALES_SPOOL_COMPACT_BYTES = int(os.getenv("SALES_SPOOL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+# Flush attempts made during shutdown before leaving a batch to the spool
+_SHUTDOWN_ATTEMPTS = 3
+
+# Errors that will fail the same way however often the batch is retried
+_POISON_ERRORS = (
+    aiomysql.IntegrityError,
+    aiomysql.DataError,
+    aiomysql.ProgrammingError,
+    aiomysql.NotSupportedError,
+    KeyError,
+    TypeError,
+    ValueError,
+)
+
+
+class QueueFull(Exception):
+    """The write-behind queue stayed full for SALES_QUEUE_PUT_TIMEOUT seconds."""
+
+
+def _encode_sale(customer_id: int, sales_date: datetime, item: SaleLine) -> dict:
+    return {"customerId": customer_id, "salesDate": sales_date.isoformat(), **item.model_dump()}
+
+
+def _decode_sale(reservation: str, sale: dict):
+    item = SaleLine(productId=sale["productId"], sellerId=sale["sellerId"], quantity=sale["quantity"], price=sale["price"])
+    return reservation, sale["customerId"], datetime.fromisoformat(sale["salesDate"]), item
+
+
+def _slot_path(template: str, slot) -> str:
+    if "{slot}" not in template:
+        root, extension = os.path.splitext(template)
+        template = root + ".{slot}" + extension
+    return template.format(slot=slot)
+
+
+# Open `path` for appending and take an exclusive lock on it; None if another process holds it
+def _lock(path: str):
+    spool = open(path, "ab+")
+    if fcntl is None:
+        return spool
+    try:
+        fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # a compaction renamed a new file over the one we opened; its owner holds that one
+        if os.fstat(spool.fileno()).st_ino != os.stat(path).st_ino:
+            raise OSError("spool was replaced")
+    except OSError:
+        spool.close()
+        return None
+    return spool
+
+
+def _fsync_directory(path: str):
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+# Submissions in an open spool that are not settled, in seq order
+def _read_pending(spool) -> list:
+    spool.seek(0)
+    entries = {}
+    flushed = 0
+    done = set()
+    for raw in spool:
+        try:
+            line = json.loads(raw)
+        except ValueError:
+            # a torn final line from a crash mid-append
+            continue
+        if "flushed" in line:
+            flushed = max(flushed, line["flushed"])
+            done.update(line.get("done", ()))
+        elif "seq" in line:
+            entries[line["seq"]] = line
+    return [entries[seq] for seq in sorted(entries) if seq > flushed and seq not in done]
+
+
+class SalesWriteBehind:
+
+    def __init__(self, maxsize: int, batch_size: int, interval: float, spool_path: str,
+                 dead_letter_path: str, fsync: bool, max_attempts: int = SALES_FLUSH_MAX_ATTEMPTS,
+                 compact_bytes: int = SALES_SPOOL_COMPACT_BYTES):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.interval = interval
+        self.spool_template = spool_path
+        self.dead_letter_template = dead_letter_path
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self.compact_bytes = compact_bytes
+        self.spool_path = None
+        self.running = False
+        self.flushed_batches = 0
+        self.flushed_sales = 0
+        self.dead_lettered = 0
+        self.compactions = 0
+        self._queue = None
+        self._slots = None
+        self._spool = None
+        self._slot = None
+        self._worker = None
+        self._seq = 0
+        self._settled = 0
+        self._done = set()
+        self._unsettled = {}
+        self._stopping = False
+        # lines written / known to be on disk, and the fsync covering the next group
+        self._written = 0
+        self._synced = 0
+        self._syncing = None
+        self._compacting = None
+        self._compacted_size = 0
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # Claim a spool, replay it and any abandoned ones, then start the worker
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.maxsize)
+        self._claim_spool()
+
+        pending = _read_pending(self._spool)
+        self._seq = self._settled = max((entry["seq"] for entry in pending), default=0)
+        if pending:
+            print(f"Replaying {sum(len(entry['sales']) for entry in pending)} spooled sales from {self.spool_path}")
+            await self._flush(pending)
+        self._spool.truncate(0)
+        await self._adopt_orphans()
+
+        self._worker = asyncio.create_task(self._run())
+        self.running = True
+
+    # Spool the sale, reserve stock for `items` and queue the sales rows; returns (results, committed)
+    async def submit(self, repository: SalesRepository, customer_id: int, sales_date: datetime, items: list):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=SALES_QUEUE_PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise QueueFull("Sales queue is full")
+
+        self._seq += 1
+        entry = {
+            "seq": self._seq,
+            "reservation": uuid.uuid4().hex,
+            "sales": [_encode_sale(customer_id, sales_date, item) for item in items],
+        }
+        # spooled before the reservation commits, so a crash in between is
+        # replayed; record_sales drops it if the checkout never committed
+        self._unsettled[entry["seq"]] = entry
+        try:
+            await self._append(entry)
+        except BaseException:
+            self._settle([entry["seq"]])
+            self._slots.release()
+            raise
+        try:
+            results, committed = await repository.checkout(customer_id, sales_date, items, reservation=entry["reservation"])
+        except BaseException:
+            # the commit may or may not have happened; the worker finds out
+            self._queue.put_nowait(entry)
+            raise
+        if not committed:
+            self._settle([entry["seq"]])
+            self._slots.release()
+            return results, False
+
+        self._queue.put_nowait(entry)
+        return results, True
+
+    # Drain the queue, flush it and close the spool; called from the app lifespan
+    async def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._stopping = True
+        self._queue.put_nowait(None)
+        await self._worker
+        self._spool.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            count = len(entry["sales"])
+            deadline = loop.time() + self.interval
+            stop = False
+            while count < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+                count += len(entry["sales"])
+
+            settled = await self._flush(batch)
+            self._settle(settled)
+            await self._checkpoint()
+            for _ in batch:
+                self._slots.release()
+            if stop:
+                return
+
+    # Write one batch, retrying with backoff; returns the seqs it settled. A
+    # batch hitting a poison error is split so the good submissions still get
+    # written; at shutdown a batch is left in the spool after a few attempts.
+    async def _flush(self, batch: list) -> list:
+        sales = [_decode_sale(entry["reservation"], sale) for entry in batch for sale in entry["sales"]]
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                connection = await acquire_connection()
+                try:
+                    written = await SalesRepository(connection).record_sales(sales)
+                finally:
+                    await release_connection(connection)
+                break
+            except Exception as err:
+                print(f"Error flushing {len(sales)} queued sales (attempt {attempt}): {err}")
+                if isinstance(err, _POISON_ERRORS) and attempt >= self.max_attempts:
+                    if len(batch) > 1:
+                        settled = []
+                        for entry in batch:
+                            settled += await self._flush([entry])
+                        return settled
+                    await self._dead_letter(batch[0], err)
+                    return [batch[0]["seq"]]
+                if self._stopping and attempt >= _SHUTDOWN_ATTEMPTS:
+                    print(f"Leaving {len(sales)} sales in {self.spool_path}")
+                    return []
+                await asyncio.sleep(min(0.1 * 2 ** attempt, 5))
+
+        self.flushed_batches += 1
+        self.flushed_sales += written
+        return [entry["seq"] for entry in batch]
+
+    # Advance the settled watermark over every seq that no longer needs replaying
+    def _settle(self, seqs):
+        for seq in seqs:
+            self._unsettled.pop(seq, None)
+        self._done.update(seqs)
+        while self._settled + 1 in self._done:
+            self._settled += 1
+            self._done.discard(self._settled)
+
+    # Record progress in the spool, empty it once everything in it is settled,
+    # or compact it once it has grown well past what is still unsettled. A lost
+    # marker only means a replay record_sales turns into a no-op, so markers
+    # are not fsynced.
+    async def _checkpoint(self):
+        if not self._unsettled:
+            self._spool.truncate(0)
+            self._compacted_size = 0
+            return
+        self._write({"flushed": self._settled, "done": sorted(self._done)})
+        if self._spool.tell() >= max(self.compact_bytes, 2 * self._compacted_size):
+            await self._compact()
+
+    # Rewrite the spool with only the unsettled submissions and rename it over
+    # the old one. The new file is locked and on disk before the rename, so a
+    # crash leaves one complete spool or the other; submissions wait meanwhile.
+    async def _compact(self):
+        loop = asyncio.get_running_loop()
+        self._compacting = loop.create_future()
+        temporary = self.spool_path + ".compact"
+        try:
+            # no fsync may still be running on the file about to be closed
+            while self._syncing is not None:
+                await asyncio.shield(self._syncing)
+            replacement = open(temporary, "wb+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(replacement.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                for seq in sorted(self._unsettled):
+                    replacement.write(dumps(self._unsettled[seq]) + b"\n")
+                replacement.flush()
+                await loop.run_in_executor(None, os.fsync, replacement.fileno())
+                os.replace(temporary, self.spool_path)
+            except BaseException:
+                replacement.close()
+                os.unlink(temporary)
+                raise
+            self._spool.close()
+            self._spool = replacement
+            self._synced = self._written
+            self._compacted_size = replacement.tell()
+            self.compactions += 1
+            await loop.run_in_executor(None, _fsync_directory, self.spool_path)
+        finally:
+            self._compacting.set_result(None)
+            self._compacting = None
+
+    async def _dead_letter(self, entry: dict, err: Exception):
+        path = _slot_path(self.dead_letter_template, self._slot)
+        line = {"failedAt": datetime.now().isoformat(), "error": repr(err), "entry": entry}
+        await asyncio.get_running_loop().run_in_executor(None, self._write_dead_letter, path, line)
+        self.dead_lettered += 1
+        print(f"Moved {len(entry['sales'])} sales that cannot be written to {path}")
+
+    def _write_dead_letter(self, path: str, line: dict):
+        with open(path, "ab") as dead_letters:
+            dead_letters.write(dumps(line) + b"\n")
+            dead_letters.flush()
+            if self.fsync:
+                os.fsync(dead_letters.fileno())
+
+    def _claim_spool(self):
+        if fcntl is None:
+            self._slot = os.getpid()
+            self.spool_path = _slot_path(self.spool_template, self._slot)
+            self._spool = _lock(self.spool_path)
+            return
+        slot = 0
+        while True:
+            path = _slot_path(self.spool_template, slot)
+            spool = _lock(path)
+            if spool is not None:
+                self._slot, self.spool_path, self._spool = slot, path, spool
+                return
+            slot += 1
+
+    # Replay spools left by processes that are gone (fewer workers after a
+    # restart), then delete them; a spool still locked belongs to a live worker
+    async def _adopt_orphans(self):
+        if fcntl is None:
+            return
+        for path in sorted(glob.glob(_slot_path(self.spool_template, "*"))):
+            if path == self.spool_path:
+                continue
+            spool = _lock(path)
+            if spool is None:
+                continue
+            try:
+                pending = _read_pending(spool)
+                if pending:
+                    print(f"Replaying {sum(len(entry['sales']) for entry in pending)} spooled sales from {path}")
+                    # replayed batches are idempotent, so a failure here just leaves the file for later
+                    if len(await self._flush(pending)) < len(pending):
+                        continue
+                os.unlink(path)
+            finally:
+                spool.close()
+
+    def _write(self, line: dict):
+        self._spool.write(dumps(line) + b"\n")
+        self._spool.flush()
+        self._written += 1
+
+    # Write a line and, with fsync on, wait until a group fsync has covered it
+    async def _append(self, line: dict):
+        while self._compacting is not None:
+            await self._compacting
+        self._write(line)
+        if not self.fsync:
+            return
+        target = self._written
+        while self._synced < target:
+            if self._compacting is not None:
+                # the compacted spool is on disk with every line written so far
+                await self._compacting
+                continue
+            if self._syncing is None:
+                self._syncing = asyncio.ensure_future(self._sync())
+            await asyncio.shield(self._syncing)
+
+    async def _sync(self):
+        try:
+            covered = self._written
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._spool.fileno())
+            self._synced = max(self._synced, covered)
+        finally:
+            self._syncing = None
+
+
+sales_write_behind = SalesWriteBehind(
+    SALES_QUEUE_MAXSIZE, SALES_FLUSH_BATCH_SIZE, SALES_FLUSH_INTERVAL,
+    SALES_SPOOL_PATH, SALES_DEAD_LETTER_PATH, SALES_SPOOL_FSYNC,
+)
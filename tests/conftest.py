@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+import pytest
+
+from bench.sqlite_pool import SQLitePool
+from database import database
+from services.cache import catalog_cache
+
+INSERT_PRODUCT = """
+    INSERT INTO products (productId, productName, productQuantity, productPrice, productMake,
+                          productExpiry, productCategory, sellerId)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+# A fresh SQLite stand-in installed as the app's pool, with three products of seller 1
+@pytest.fixture
+def pool():
+    pool = SQLitePool()
+    pool.create_schema()
+    today = date.today()
+    pool.executemany(INSERT_PRODUCT, [
+        (product_id, f"Product {product_id}", 100, 2.5, today, today + timedelta(days=30), "fruit", 1)
+        for product_id in (1, 2, 3)
+    ])
+    database.use_pool(pool)
+    catalog_cache.clear()
+    yield pool
+    database.use_pool(None)
+    catalog_cache.clear()
+
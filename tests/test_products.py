@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+
+from main import app
+
+
+def _requests(*calls):
+    async def run():
+        responses = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for call in calls:
+                responses.append(await call(client, responses))
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_put_with_stale_etag_is_a_conflict(pool):
+    read, first, second = _requests(
+        lambda client, _: client.get("/products/1"),
+        lambda client, previous: client.put(
+            "/products/1", json=dict(previous[0].json(), productQuantity=7), headers={"If-Match": previous[0].headers["ETag"]},
+        ),
+        lambda client, previous: client.put(
+            "/products/1", json=dict(previous[0].json(), productQuantity=8), headers={"If-Match": previous[0].headers["ETag"]},
+        ),
+    )
+    assert read.headers["ETag"] == '"p1-v0"'
+    assert first.status_code == 200
+    assert first.headers["ETag"] == '"p1-v1"'
+    assert second.status_code == 409
+    assert second.json()["detail"]["rowVersion"] == 1
+
+
+def test_patch_with_stale_row_version_is_a_conflict(pool):
+    first, second = _requests(
+        lambda client, _: client.patch("/products/2", json={"productQuantity": 7}, headers={"If-Match": "0"}),
+        lambda client, _: client.patch("/products/2", json={"productQuantity": 8}, headers={"If-Match": "0"}),
+    )
+    assert first.status_code == 200
+    assert first.json()["productQuantity"] == 7
+    assert second.status_code == 409
+
+
+def test_put_without_precondition_is_refused(pool):
+    read, put = _requests(
+        lambda client, _: client.get("/products/3"),
+        lambda client, previous: client.put("/products/3", json=dict(previous[0].json(), rowVersion=None)),
+    )
+    assert put.status_code == 428
+
+
+def test_if_match_for_another_product_fails(pool):
+    (response,) = _requests(
+        lambda client, _: client.patch("/products/1", json={"productQuantity": 7}, headers={"If-Match": '"p2-v0"'}),
+    )
+    assert response.status_code == 412
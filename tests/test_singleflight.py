@@ -0,0 +1,79 @@
+import asyncio
+
+from database import database
+from repositories.products import ProductRepository
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_query():
+    calls = 0
+
+    async def run():
+        group = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return calls
+
+        waiting = [asyncio.create_task(group.do("key", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(run()) == [1] * 5
+    assert calls == 1
+
+
+# Reads started before a write holds them in flight; their callers get the
+# pre-write row, but nobody arriving after the write may join them or find
+# their result in the cache
+def _read_across_write(read):
+    async def run():
+        release = asyncio.Event()
+        connections = [await database.acquire_connection() for _ in range(3)]
+        slow, writer, late = (ProductRepository(connection) for connection in connections)
+        fetchone, fetchall = slow.fetchone, slow.fetchall
+
+        async def held_fetchone(*args):
+            row = await fetchone(*args)
+            await release.wait()
+            return row
+
+        async def held_fetchall(*args):
+            rows = await fetchall(*args)
+            await release.wait()
+            return rows
+
+        slow.fetchone, slow.fetchall = held_fetchone, held_fetchall
+        try:
+            before = asyncio.create_task(read(slow))
+            await asyncio.sleep(0.01)
+            await writer.patch(1, {"productQuantity": 42})
+            after = await asyncio.wait_for(read(late), timeout=1)
+            release.set()
+            await before
+            again = await read(late)
+            return after, again
+        finally:
+            for connection in connections:
+                await database.release_connection(connection)
+
+    return asyncio.run(run())
+
+
+def test_product_read_is_not_coalesced_across_a_write(pool):
+    after, again = _read_across_write(lambda products: products.get_active(1))
+    assert after["productQuantity"] == 42
+    assert again["productQuantity"] == 42
+
+
+def test_listing_is_not_cached_across_a_write(pool):
+    def quantity(products):
+        return {product["productId"]: product["productQuantity"] for product in products}[1]
+
+    after, again = _read_across_write(lambda products: products.active_by_seller(1))
+    assert quantity(after) == 42
+    assert quantity(again) == 42
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from datetime import datetime
+
+import aiomysql
+
+from database import database
+from models.sales import SaleLine
+from repositories.sales import SalesRepository
+from services.write_behind import SalesWriteBehind
+
+
+def _write_behind(tmp_path, **options):
+    options = {"fsync": False, "max_attempts": 1, **options}
+    return SalesWriteBehind(
+        1000, 100, options.pop("interval", 0.01),
+        str(tmp_path / "spool.{slot}.jsonl"), str(tmp_path / "dead.{slot}.jsonl"), **options,
+    )
+
+
+async def _submit(write_behind, customer_id, product_id, quantity=1):
+    connection = await database.acquire_connection()
+    try:
+        item = SaleLine(productId=product_id, sellerId=1, quantity=quantity, price=2.5)
+        return await write_behind.submit(SalesRepository(connection), customer_id, datetime.now(), [item])
+    finally:
+        await database.release_connection(connection)
+
+
+def _count(pool, sql):
+    return pool._db.execute(sql).fetchone()[0]
+
+
+# The process dies after a flush committed but before the spool recorded it:
+# the restart replays the batch and record_sales writes nothing twice
+def test_replay_after_crash_mid_flush(pool, tmp_path, monkeypatch):
+    record_sales = SalesRepository.record_sales
+
+    async def crash():
+        hang = asyncio.Event()
+
+        async def commit_then_hang(self, sales):
+            await record_sales(self, sales)
+            await hang.wait()
+
+        monkeypatch.setattr(SalesRepository, "record_sales", commit_then_hang)
+        write_behind = _write_behind(tmp_path)
+        await write_behind.start()
+        for customer_id in (1, 2, 3):
+            await _submit(write_behind, customer_id, customer_id)
+        while _count(pool, "SELECT COUNT(*) FROM sales") < 3:
+            await asyncio.sleep(0.01)
+        # no stop(): the worker and the spool just go away
+        write_behind._worker.cancel()
+        write_behind._spool.close()
+        monkeypatch.setattr(SalesRepository, "record_sales", record_sales)
+
+    async def restart():
+        write_behind = _write_behind(tmp_path)
+        await write_behind.start()
+        await write_behind.stop()
+
+    asyncio.run(crash())
+    assert len((tmp_path / "spool.0.jsonl").read_bytes().splitlines()) == 3
+
+    asyncio.run(restart())
+    assert _count(pool, "SELECT COUNT(*) FROM sales") == 3
+    assert _count(pool, "SELECT COUNT(*) FROM sales_reservations") == 0
+    assert _count(pool, "SELECT SUM(sold) FROM products") == 3
+    assert (tmp_path / "spool.0.jsonl").read_bytes() == b""
+
+
+# A spooled sale whose checkout never committed is dropped on replay
+def test_replay_skips_uncommitted_checkout(pool, tmp_path):
+    spool = tmp_path / "spool.0.jsonl"
+    line = {"seq": 1, "reservation": "never-committed", "sales": [
+        {"customerId": 1, "salesDate": datetime.now().isoformat(), "productId": 1, "sellerId": 1, "quantity": 1, "price": 2.5},
+    ]}
+    spool.write_text(json.dumps(line) + "\n")
+
+    async def restart():
+        write_behind = _write_behind(tmp_path)
+        await write_behind.start()
+        await write_behind.stop()
+
+    asyncio.run(restart())
+    assert _count(pool, "SELECT COUNT(*) FROM sales") == 0
+    assert spool.read_bytes() == b""
+
+
+# A sale that can never be written is split out of its batch and dead-lettered;
+# the rest of the batch is still written
+def test_poison_sale_is_dead_lettered(pool, tmp_path, monkeypatch):
+    record_sales = SalesRepository.record_sales
+
+    async def reject_customer_9(self, sales):
+        if any(customer_id == 9 for _, customer_id, _, _ in sales):
+            raise aiomysql.IntegrityError(1452, "foreign key constraint fails")
+        return await record_sales(self, sales)
+
+    monkeypatch.setattr(SalesRepository, "record_sales", reject_customer_9)
+
+    async def run():
+        write_behind = _write_behind(tmp_path, interval=0.2)
+        await write_behind.start()
+        await asyncio.gather(_submit(write_behind, 1, 1), _submit(write_behind, 9, 2), _submit(write_behind, 2, 3))
+        await write_behind.stop()
+        return write_behind
+
+    write_behind = asyncio.run(run())
+    assert write_behind.dead_lettered == 1
+    assert _count(pool, "SELECT COUNT(*) FROM sales") == 2
+    assert _count(pool, "SELECT COUNT(*) FROM sales WHERE customerId = 9") == 0
+    dead_letters = [json.loads(line) for line in (tmp_path / "dead.0.jsonl").read_text().splitlines()]
+    assert [sale["customerId"] for line in dead_letters for sale in line["entry"]["sales"]] == [9]
+    assert "IntegrityError" in dead_letters[0]["error"]